@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+POSTS_COUNT = 13
+
+
+class FeedApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='Тестовое название',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        self.author = User.objects.create(username='author')
+        self.user = User.objects.create(username='reader')
+        self.client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Follow.objects.create(user=self.user, author=self.author)
+        for number in range(POSTS_COUNT):
+            Post.objects.create(
+                text=f'Тестовый пост {number}',
+                author=self.author,
+                group=self.group
+            )
+        self.post = Post.objects.latest('pub_date')
+
+    def test_feeds_are_paginated_json(self):
+        """Проверка JSON лент с курсорной паджинацией."""
+        urls = {
+            'index': reverse('api:index'),
+            'group_list': reverse('api:group_list', args=['test-slug']),
+            'profile': reverse('api:profile', args=['author']),
+            'follow_index': reverse('api:follow_index'),
+        }
+        for name, url in urls.items():
+            with self.subTest(view=name):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertNotIn(b', "', response.content)
+                data = response.json()
+                self.assertEqual(len(data['results']), 10)
+                self.assertEqual(data['results'][0]['id'], self.post.id)
+                self.assertEqual(data['results'][0]['author'], 'author')
+                self.assertEqual(data['results'][0]['group'], 'test-slug')
+                self.assertIsNone(data['previous'])
+                data = self.authorized_client.get(
+                    url, {'cursor': data['next']}
+                ).json()
+                self.assertEqual(len(data['results']), 3)
+                self.assertIsNone(data['next'])
+
+    def test_post_detail_with_comments(self):
+        """Проверка поста с первой порцией комментариев."""
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        data = self.client.get(
+            reverse('api:post_detail', args=[self.post.id])
+        ).json()
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['comment_count'], 1)
+        self.assertEqual(data['comments']['results'][0]['author'], 'reader')
+
+    def test_missing_objects_and_anonymous_feed(self):
+        """Проверка 404 для несуществующих объектов и 401 для ленты."""
+        for url in (
+            reverse('api:group_list', args=['missing']),
+            reverse('api:profile', args=['missing']),
+            reverse('api:post_detail', args=[0]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(reverse('api:follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_revalidation_returns_not_modified(self):
+        """Проверка ответа 304 на повторный запрос с валидаторами."""
+        url = reverse('api:index')
+        response = self.client.get(url)
+        self.assertEqual(
+            response['Last-Modified'],
+            self.post.pub_date.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertLessEqual(len(queries), 1)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_update_etag(self):
+        """Проверка смены ETag после новых постов, правок и комментариев."""
+        index = reverse('api:index')
+        profile = reverse('api:profile', args=['author'])
+        detail = reverse('api:post_detail', args=[self.post.id])
+        changes = {
+            'новый пост': (
+                lambda: Post.objects.create(text='Новый', author=self.author),
+                (index, profile, detail)
+            ),
+            'правка': (
+                lambda: Post.objects.get(pk=self.post.pk).save(),
+                (index, profile, detail)
+            ),
+            'комментарий': (
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.user, text='Комментарий'
+                ),
+                (detail,)
+            ),
+        }
+        for name, (change, urls) in changes.items():
+            etags = [self.client.get(url)['ETag'] for url in urls]
+            change()
+            for url, etag in zip(urls, etags):
+                with self.subTest(change=name, url=url):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
@@ -0,0 +1,95 @@
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from core.conditional import conditional
+from posts import conditions, timeline
+from posts.models import Group, Post, User
+from posts.views import POSTS_PER_PAGE, get_comments_page, get_page_obj
+
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def serialize_post(post):
+    return {
+        'id': post.id,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.url if post.image else None,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    }
+
+
+def serialize_page(page, serialize):
+    return {
+        'results': [serialize(item) for item in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def feed_response(request, posts):
+    return page_response(get_page_obj(request, posts.for_feed()))
+
+
+def page_response(page_obj):
+    return json_response(serialize_page(page_obj, serialize_post))
+
+
+@require_safe
+@conditional(conditions.index)
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@require_safe
+@conditional(conditions.group_posts)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.all())
+
+
+@require_safe
+@conditional(conditions.profile)
+def profile(request, username):
+    user = get_object_or_404(User, username=username)
+    return feed_response(request, user.posts.all())
+
+
+@require_safe
+@conditional(conditions.follow_index)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return json_response({'detail': 'Нужна авторизация'}, status=401)
+    return page_response(timeline.feed_page(
+        request.user, POSTS_PER_PAGE, request.GET.get('cursor')
+    ))
+
+
+@require_safe
+@conditional(conditions.post_detail)
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'),
+        id=post_id
+    )
+    data = serialize_post(post)
+    data['comment_count'] = post.comment_count
+    data['comments'] = serialize_page(
+        get_comments_page(request, post.id), serialize_comment
+    )
+    return json_response(data)
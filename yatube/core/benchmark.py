@@ -0,0 +1,124 @@
+"""Замеры маршрутов сайта через тестовый клиент Django.
+
+Для каждого маршрута из ROUTE_MODULES делается несколько запросов от
+имени одного пользователя и считаются p50/p95 времени ответа, число и
+время SQL-запросов и размер ответа. Аргументы маршрутов подбираются по
+данным в базе: самая большая группа, самый популярный автор и т.д.
+"""
+import math
+import time
+from importlib import import_module
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, UserStats
+
+ROUTE_MODULES = ('posts.urls', 'users.urls', 'about.urls')
+
+
+def routes():
+    """Пары (имя маршрута с пространством имён, имена его аргументов)."""
+    for module_name in ROUTE_MODULES:
+        module = import_module(module_name)
+        for pattern in module.urlpatterns:
+            yield (
+                f'{module.app_name}:{pattern.name}',
+                tuple(pattern.pattern.converters)
+            )
+
+
+def pick_targets():
+    """Пользователь для запросов и значения аргументов маршрутов."""
+    viewer = UserStats.objects.select_related('user').order_by(
+        '-post_count', '-following_count'
+    ).first().user
+    author = UserStats.objects.exclude(user=viewer).select_related(
+        'user'
+    ).order_by('-follower_count').first() or viewer.stats
+    group = Group.objects.order_by('-post_count').first()
+    post = Post.objects.filter(author=viewer).first()
+    kwargs = {
+        'username': author.user.username,
+        'slug': group.slug if group else 'missing',
+        'post_id': post.id if post else 0,
+        'uidb64': 'MQ',
+        'token': 'set-password',
+    }
+    return viewer, kwargs
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(client, viewer, url, requests, warm=False):
+    latencies = []
+    queries = []
+    sql_times = []
+    for _ in range(requests):
+        client.force_login(viewer)
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            size = response_size(response)
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(captured))
+        sql_times.append(sum(float(query['time']) for query in captured))
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'queries': max(queries),
+        'sql_ms': round(percentile(sql_times, 0.5) * 1000, 2),
+        'bytes': size,
+    }
+
+
+def run(requests=20, warm=False):
+    """Замеры всех маршрутов на текущих данных."""
+    viewer, values = pick_targets()
+    client = Client()
+    results = {}
+    for name, params in routes():
+        url = reverse(name, kwargs={param: values[param] for param in params})
+        results[name] = measure(client, viewer, url, requests, warm)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Регрессии относительно базовых замеров.
+
+    Маршрут считается регрессировавшим, если его p50 вырос больше чем на
+    долю threshold или стало больше SQL-запросов.
+    """
+    regressions = []
+    for size, routes_results in results.items():
+        for name, current in routes_results.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if current['p50_ms'] > base['p50_ms'] * (1 + threshold):
+                regressions.append(
+                    f'{size} {name}: p50 {base["p50_ms"]} -> '
+                    f'{current["p50_ms"]} мс'
+                )
+            if current['queries'] > base['queries']:
+                regressions.append(
+                    f'{size} {name}: запросов {base["queries"]} -> '
+                    f'{current["queries"]}'
+                )
+    return regressions
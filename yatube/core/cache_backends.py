@@ -0,0 +1,375 @@
+"""Двухуровневый кеш для нескольких процессов на одном хосте.
+
+Первый уровень — небольшой LRU в памяти процесса, второй — общий файл
+SQLite, видимый всем воркерам. Запись идёт сразу в SQLite и попадает в
+журнал инвалидаций; процессы раз в SYNC_INTERVAL секунд читают журнал и
+выбрасывают из своей памяти изменённые ключи. `add` и `incr` выполняются
+только на общем уровне, поэтому блокировки и счётчики атомарны между
+процессами.
+
+Настройки (OPTIONS):
+    MAX_ENTRIES, CULL_FREQUENCY — ограничение размера файла, как у DB-кеша;
+    LOCAL_MAX_ENTRIES — размер LRU в памяти процесса;
+    LOCAL_TIMEOUT — сколько секунд значение живёт в памяти процесса;
+    SYNC_INTERVAL — как часто читать журнал инвалидаций.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    'CREATE TABLE IF NOT EXISTS invalidations ('
+    ' seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT)',
+)
+INVALIDATIONS_KEPT = 10000
+CULL_CHECK_EVERY = 100
+
+# Память процесса общая для всех потоков: Django создаёт отдельный
+# экземпляр бэкенда на каждый поток.
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.last_seq = None
+        self.last_sync = 0.0
+        self.writes = 0
+        self.stats = Counter()
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            pickled, expires = entry
+            if expires <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return pickled
+
+    def set(self, key, pickled, expires):
+        with self.lock:
+            self.entries[key] = (pickled, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['local_evictions'] += 1
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 5))
+        self._sync_interval = float(options.get('SYNC_INTERVAL', 0.5))
+        with _local_tiers_lock:
+            self._tier = _local_tiers.setdefault(
+                location,
+                LocalTier(int(options.get('LOCAL_MAX_ENTRIES', 1000)))
+            )
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self._path,
+                timeout=10,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+            self._pid = os.getpid()
+            if self._tier.last_seq is None:
+                self._tier.last_seq = self._connection.execute(
+                    'SELECT COALESCE(MAX(seq), 0) FROM invalidations'
+                ).fetchone()[0]
+        return self._connection
+
+    def get_stats(self):
+        """Счётчики попаданий и промахов текущего процесса."""
+        return dict(self._tier.stats)
+
+    def _sync(self, now):
+        tier = self._tier
+        if now - tier.last_sync < self._sync_interval:
+            return
+        tier.last_sync = now
+        rows = self.connection.execute(
+            'SELECT seq, key FROM invalidations WHERE seq > ? ORDER BY seq',
+            (tier.last_seq,)
+        ).fetchall()
+        if not rows:
+            return
+        if rows[0][0] > tier.last_seq + 1:
+            # Журнал успели подрезать: безопаснее забыть всё.
+            tier.clear()
+        for seq, key in rows:
+            if key is None:
+                tier.clear()
+            else:
+                tier.discard(key)
+            tier.stats['invalidations'] += 1
+        tier.last_seq = rows[-1][0]
+
+    def _invalidate(self, keys):
+        self.connection.executemany(
+            'INSERT INTO invalidations (key) VALUES (?)',
+            [(key,) for key in keys]
+        )
+
+    def _local_expiry(self, expires, now):
+        local_expires = now + self._local_timeout
+        if expires is None:
+            return local_expires
+        return min(expires, local_expires)
+
+    def _fetch(self, keys, now):
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self._tier.get(key, now)
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickled
+        stats = self._tier.stats
+        stats['local_hits'] += len(found)
+        if missing:
+            placeholders = ', '.join('?' * len(missing))
+            rows = self.connection.execute(
+                f'SELECT key, value, expires FROM cache '
+                f'WHERE key IN ({placeholders})',
+                missing
+            ).fetchall()
+            for key, pickled, expires in rows:
+                if expires is not None and expires <= now:
+                    continue
+                self._tier.set(key, pickled, self._local_expiry(expires, now))
+                found[key] = pickled
+                stats['shared_hits'] += 1
+            stats['misses'] += len(keys) - len(found)
+        return {key: pickle.loads(pickled) for key, pickled in found.items()}
+
+    def _store(self, rows, now):
+        """Записывает строки (key, pickled, expires) в общий уровень."""
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                rows
+            )
+            self._invalidate(key for key, _, _ in rows)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        for key, pickled, expires in rows:
+            self._tier.set(key, pickled, self._local_expiry(expires, now))
+        self._tier.stats['sets'] += len(rows)
+        self._maybe_cull(len(rows))
+
+    def _maybe_cull(self, writes):
+        tier = self._tier
+        tier.writes += writes
+        if tier.writes < CULL_CHECK_EVERY:
+            return
+        tier.writes = 0
+        connection = self.connection
+        connection.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),)
+        )
+        connection.execute(
+            'DELETE FROM invalidations WHERE seq <= '
+            '(SELECT MAX(seq) FROM invalidations) - ?',
+            (INVALIDATIONS_KEPT,)
+        )
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            # Проверка идёт раз в CULL_CHECK_EVERY записей, и перебор может
+            # быть большим: удаляется он весь плюс доля MAX_ENTRIES, как
+            # в DB-кеше Django.
+            culled = (
+                count - self._max_entries
+                + max(self._max_entries // self._cull_frequency, 1)
+            )
+            connection.execute(
+                'DELETE FROM cache WHERE rowid IN '
+                '(SELECT rowid FROM cache ORDER BY rowid LIMIT ?)',
+                (culled,)
+            )
+            tier.stats['shared_evictions'] += culled
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        self._sync(now)
+        return self._fetch([key], now).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys_map = {self.make_key(key, version=version): key for key in keys}
+        for key in keys_map:
+            self.validate_key(key)
+        now = time.time()
+        self._sync(now)
+        found = self._fetch(list(keys_map), now)
+        return {keys_map[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._store([(key, pickled, self._expires(timeout))], time.time())
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        rows = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            rows.append((key, pickled, expires))
+        if rows:
+            self._store(rows, time.time())
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self._expires(timeout)
+        now = time.time()
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, now)
+            )
+            added = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                (key, pickled, expires)
+            ).rowcount == 1
+            if added:
+                self._invalidate([key])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        if added:
+            self._tier.set(key, pickled, self._local_expiry(expires, now))
+            self._tier.stats['sets'] += 1
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?', (pickled, key)
+            )
+            self._invalidate([key])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        self._tier.set(key, pickled, self._local_expiry(row[1], now))
+        self._tier.stats['sets'] += 1
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        touched = self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ?',
+            (self._expires(timeout), key)
+        ).rowcount == 1
+        self._tier.discard(key)
+        return touched
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        if not keys:
+            return
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'DELETE FROM cache WHERE key = ?', [(key,) for key in keys]
+            )
+            self._invalidate(keys)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        for key in keys:
+            self._tier.discard(key)
+        self._tier.stats['deletes'] += len(keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        self._sync(now)
+        return key in self._fetch([key], now)
+
+    def clear(self):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('DELETE FROM cache')
+            self._invalidate([None])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        self._tier.clear()
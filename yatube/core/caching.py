@@ -0,0 +1,266 @@
+"""Кеширование страниц с версионными ключами.
+
+Каждая страница зависит от набора областей (scope), например `posts` или
+`group:<slug>`. У каждой области есть счётчик-поколение в кеше; запись
+данных увеличивает поколение, и ключи всех зависимых страниц меняются.
+Поэтому TTL может быть длинным: кеш никогда не отдаёт страницу старше
+последней записи.
+
+Пересчёт защищён от «набега» (cache stampede): страницу пересчитывает
+только один запрос, захвативший блокировку в кеше, остальные получают
+предыдущее значение или ждут недолго. Кроме того, значение обновляется
+заранее с вероятностью, растущей к концу TTL (probabilistic early
+expiration, XFetch).
+
+Попадания и промахи считаются здесь, для Server-Timing и метрик
+(core.timing): попадание — ответ из кеша, в том числе устаревший, пока
+другой запрос считает новый; промах — пересчёт.
+"""
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core import timing
+from core.streaming import accepts_gzip
+
+GENERATION_KEY = 'generation:{}'
+LOCK_KEY = 'lock:{}'
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+STALE_GRACE = 60
+EARLY_EXPIRY_BETA = 1.0
+
+
+def initial_generation():
+    # Поколение стартует с текущего времени, а не с единицы: если ключ
+    # вытеснят из кеша, новые значения не совпадут со старыми.
+    return int(time.time() * 1000)
+
+
+def get_generations(scopes):
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, initial_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump(*scopes):
+    """Делает устаревшими все страницы, зависящие от областей."""
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, initial_generation(), None):
+                cache.incr(key)
+
+
+def page_key(request, view_name, scopes):
+    user = getattr(request, 'user', None)
+    viewer = user.pk if user is not None and user.is_authenticated else ''
+    generations = get_generations(scopes)
+    # Клиенту с gzip страница может уйти сжатым потоком (core.streaming),
+    # и в кеш попадает уже сжатое тело.
+    encoding = 'gzip' if accepts_gzip(request) else ''
+    raw = f'{request.get_full_path()}|{viewer}|{encoding}|{generations}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'page:{view_name}:{digest}'
+
+
+def should_refresh(expires, delta, beta, now=None):
+    """Решает, пора ли пересчитать значение (XFetch)."""
+    now = time.time() if now is None else now
+    return now - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def acquire_lock(key):
+    token = uuid.uuid4().hex
+    if cache.add(LOCK_KEY.format(key), token, LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def release_lock(key, token):
+    lock_key = LOCK_KEY.format(key)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def wait_for_value(key):
+    deadline = time.time() + LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def store(key, value, timeout, started):
+    finished = time.time()
+    cache.set(
+        key,
+        (value, finished + timeout, finished - started),
+        timeout + STALE_GRACE
+    )
+
+
+def finisher(key, token, timeout, started):
+    """Сохранение пересчитанного значения со снятием блокировки.
+
+    Возвращает finish(value); value=None значит, что сохранять нечего.
+    """
+    def finish(value):
+        try:
+            if value is not None:
+                store(key, value, timeout, started)
+        finally:
+            if token is not None:
+                release_lock(key, token)
+    return finish
+
+
+def get_or_compute(key, compute, timeout, cacheable=None,
+                   beta=EARLY_EXPIRY_BETA, defer=None):
+    """Возвращает значение из кеша, пересчитывая его не более одного раза.
+
+    В кеше хранится кортеж (значение, момент устаревания, время расчёта).
+    Устаревшее значение живёт ещё STALE_GRACE секунд, чтобы его можно было
+    отдать, пока один запрос считает новое.
+
+    Если значение готово не сразу (потоковый ответ), defer(value, finish)
+    может взять его на себя и вернуть True: тогда блокировка держится,
+    пока не будет вызван finish(итоговое значение или None).
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        if not should_refresh(expires, delta, beta):
+            timing.count('cache_hits')
+            return value
+        token = acquire_lock(key)
+        if token is None:
+            timing.count('cache_hits')
+            return value
+    else:
+        token = acquire_lock(key)
+        if token is None:
+            entry = wait_for_value(key)
+            if entry is not None:
+                timing.count('cache_hits')
+                return entry[0]
+    timing.count('cache_misses')
+    finish = finisher(key, token, timeout, time.time())
+    try:
+        value = compute()
+    except BaseException:
+        finish(None)
+        raise
+    if defer is None or not defer(value, finish):
+        finish(value if cacheable is None or cacheable(value) else None)
+    return value
+
+
+def cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    )
+
+
+class StreamTee:
+    """Тело потокового ответа, которое копится по мере отдачи.
+
+    Когда тело отдано целиком, on_complete получает его байты; если ответ
+    закрыт раньше (клиент ушёл, HEAD), — None.
+    """
+
+    def __init__(self, content, on_complete):
+        self.content = content
+        self.on_complete = on_complete
+        self.completed = False
+
+    def __iter__(self):
+        chunks = []
+        for chunk in self.content:
+            chunks.append(chunk)
+            yield chunk
+        self.complete(b''.join(chunks))
+
+    def close(self):
+        # Django закрывает ответ после отдачи, в том числе оборванной.
+        self.complete(None)
+
+    def complete(self, body):
+        if not self.completed:
+            self.completed = True
+            self.on_complete(body)
+
+
+def defer_stream(response, finish):
+    """Откладывает запись потокового ответа в кеш до конца его отдачи.
+
+    Из кусков тела собирается обычный HttpResponse с теми же заголовками.
+    Оборванный поток не кешируется.
+    """
+    if not response.streaming or response.status_code != 200:
+        return False
+    # Заголовки берутся сразу после view, как и у ответов, которые
+    # кешируются целиком: то, что добавят middleware, в кеш не попадает.
+    headers = list(response.items())
+
+    def on_complete(body):
+        if body is None or response.status_code != 200 or response.cookies:
+            finish(None)
+            return
+        cached = HttpResponse(body)
+        for header, value in headers:
+            cached[header] = value
+        finish(cached)
+
+    response.streaming_content = StreamTee(
+        response.streaming_content, on_complete
+    )
+    return True
+
+
+def cache_page_versioned(timeout, *scopes):
+    """Кеширует GET-ответ view с учётом поколений областей.
+
+    Области задаются шаблонами, которые заполняются аргументами view:
+    `cache_page_versioned(60, 'group:{slug}')`. Ответ кешируется отдельно
+    для каждого пользователя, так как в шапке страницы есть его имя.
+    Пересчёт идёт через `get_or_compute`, то есть без набега запросов.
+    Потоковый ответ попадает в кеш после того, как отдан целиком; до
+    этого блокировка пересчёта не снимается.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            key = page_key(
+                request,
+                view_func.__name__,
+                [scope.format(**kwargs) for scope in scopes]
+            )
+            return get_or_compute(
+                key,
+                lambda: view_func(request, *args, **kwargs),
+                timeout,
+                cacheable=cacheable_response,
+                defer=defer_stream
+            )
+        return _wrapped_view
+    return decorator
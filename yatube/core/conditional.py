@@ -0,0 +1,71 @@
+"""Условные GET-запросы: ETag и Last-Modified до выполнения view.
+
+conditional() — обёртка над django.views.decorators.http.condition,
+которая считает оба валидатора одной функцией и один раз за запрос.
+Функция получает аргументы view и возвращает пару (etag, last_modified)
+или None, если валидаторов нет (например, объекта не существует).
+
+Страницы, которые клиенту с gzip уходят сжатыми (core.streaming),
+оборачиваются с by_encoding=True: у сжатого варианта свой ETag, а любой
+ответ, включая 304, получает Vary: Accept-Encoding.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
+
+from core.streaming import accepts_gzip
+
+VALIDATORS_ATTR = '_conditional_validators'
+
+
+def make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_validators(request, compute, *args, **kwargs):
+    """Пара (etag, last_modified) запроса; compute вызывается один раз.
+
+    View под conditional() может узнать так, что объекта нет, без
+    повторного запроса к базе: пара будет (None, None).
+    """
+    if not hasattr(request, VALIDATORS_ATTR):
+        setattr(
+            request,
+            VALIDATORS_ATTR,
+            compute(request, *args, **kwargs) or (None, None)
+        )
+    return getattr(request, VALIDATORS_ATTR)
+
+
+def conditional(compute, by_encoding=False):
+    def validators(request, *args, **kwargs):
+        return get_validators(request, compute, *args, **kwargs)
+
+    def etag(request, *args, **kwargs):
+        value = validators(request, *args, **kwargs)[0]
+        if value and by_encoding and accepts_gzip(request):
+            return f'{value}-gzip'
+        return value
+
+    decorator = condition(
+        etag_func=etag,
+        last_modified_func=(
+            lambda *args, **kwargs: validators(*args, **kwargs)[1]
+        )
+    )
+    if not by_encoding:
+        return decorator
+
+    def vary_decorator(view_func):
+        view = decorator(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ['Accept-Encoding'])
+            return response
+        return _wrapped_view
+    return vary_decorator
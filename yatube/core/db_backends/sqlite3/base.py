@@ -0,0 +1,41 @@
+"""SQLite с настройками для одновременной работы читателей и писателей.
+
+Каждое новое соединение переводится в режим WAL: читатели не ждут
+писателя, а писатель — читателей. Остальные PRAGMA из PRAGMAS задают
+ожидание блокировки вместо ошибки «database is locked», ослабленный
+fsync (в WAL это безопасно для целостности) и память под кеш страниц
+и mmap. Значения можно переопределить в OPTIONS['pragmas'].
+
+Транзакции начинаются с BEGIN IMMEDIATE: при обычном BEGIN транзакция,
+которая сначала читает, а потом пишет, получает ошибку блокировки сразу,
+не дожидаясь busy_timeout, если другой писатель успел её опередить.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Отрицательное значение — размер в КиБ, около 64 МБ.
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**PRAGMAS, **self.settings_dict['OPTIONS'].get(
+            'pragmas', {}
+        )}
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+
+# Сколько пользователей, групп, комментариев и подписок досоздавать на
+# каждую тысячу постов.
+PER_THOUSAND_POSTS = {
+    'users': 20,
+    'groups': 0.2,
+    'comments': 2000,
+    'follows': 200,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа, SQL-запросы и размер ответа каждого маршрута '
+        'на отдельной базе с разными объёмами данных и сравнивает результат '
+        'с базовым'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,100000,1000000',
+            help='Объёмы данных в постах через запятую'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Сколько запросов делать к каждому маршруту'
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Не очищать кеш перед запросами'
+        )
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument(
+            '--baseline',
+            default=None,
+            help='JSON прошлого запуска, с которым сравнивать'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.25,
+            help='Допустимый рост p50 относительно базового (доля)'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',')})
+        except ValueError:
+            raise CommandError('--sizes: ожидаются числа через запятую')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+
+        with tempfile.TemporaryDirectory() as directory:
+            caches = {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased'
+                               '.FileBasedCache',
+                    'LOCATION': os.path.join(directory, 'cache'),
+                }
+            }
+            # Запросы идут через тестовый клиент, но с настройками,
+            # близкими к боевым: без DEBUG и его журнала запросов.
+            with override_settings(
+                DEBUG=False,
+                ALLOWED_HOSTS=['testserver'],
+                CACHES=caches,
+                THUMBNAIL_WORKERS=0
+            ):
+                results = self.run_sizes(
+                    sizes, os.path.join(directory, 'db.sqlite3'), options
+                )
+
+        with open(options['output'], 'w') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        self.report(results)
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+
+        if baseline is not None:
+            regressions = benchmark.compare(
+                results, baseline, options['threshold']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии относительно базовых замеров:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write('Регрессий нет')
+
+    def run_sizes(self, sizes, database_name, options):
+        """Замеры на отдельной базе, которая растёт от меньшего объёма."""
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        original_test_name = test_settings.get('NAME')
+        test_settings['NAME'] = database_name
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        results = {}
+        try:
+            seeded = 0
+            for size in sizes:
+                self.grow(size - seeded, options['seed'] + size)
+                seeded = size
+                self.stdout.write(f'Замеры на {size} постах')
+                results[str(size)] = benchmark.run(
+                    options['requests'], options['warm']
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = original_test_name
+        return results
+
+    def grow(self, posts, seed):
+        thousands = posts / 1000
+        counts = {
+            name: max(round(per_thousand * thousands), 1)
+            for name, per_thousand in PER_THOUSAND_POSTS.items()
+        }
+        call_command(
+            'seed', posts=posts, seed=seed, stdout=self.stdout, **counts
+        )
+
+    def report(self, results):
+        for size, routes in results.items():
+            self.stdout.write(f'\n{size} постов')
+            self.stdout.write(
+                f'{"маршрут":<32}{"код":>5}{"p50 мс":>10}{"p95 мс":>10}'
+                f'{"SQL":>5}{"SQL мс":>9}{"байт":>9}'
+            )
+            for name, stats in routes.items():
+                self.stdout.write(
+                    f'{name:<32}{stats["status"]:>5}{stats["p50_ms"]:>10}'
+                    f'{stats["p95_ms"]:>10}{stats["queries"]:>5}'
+                    f'{stats["sql_ms"]:>9}{stats["bytes"]:>9}'
+                )
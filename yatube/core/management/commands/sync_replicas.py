@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite во все реплики из DATABASE_REPLICAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Повторять копирование каждые N секунд, 0 — один раз'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: DATABASE_REPLICAS пуст')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                replicas.sync(alias)
+            self.stdout.write(
+                f'Реплик обновлено: {len(settings.DATABASE_REPLICAS)}'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
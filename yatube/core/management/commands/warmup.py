@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны, строит URL-резолверы и заполняет кеш '
+        'первыми страницами главной и самых больших групп'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--groups',
+            type=int,
+            default=warmup.PRERENDER_GROUPS,
+            help='Сколько самых больших групп отрисовать заранее'
+        )
+
+    def handle(self, *args, **options):
+        templates = warmup.compile_templates()
+        urls = warmup.resolve_urls()
+        pages = warmup.prerender_pages(options['groups'])
+        self.stdout.write(
+            f'Шаблонов: {templates}, маршрутов: {urls}, страниц: {pages}'
+        )
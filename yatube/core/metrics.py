@@ -0,0 +1,191 @@
+"""Метрики запросов в формате Prometheus, общие для всех воркеров.
+
+Каждый процесс копит приращения счётчиков в памяти и раз в
+METRICS_FLUSH_INTERVAL секунд прибавляет их к строкам общего файла
+SQLite (METRICS_PATH). Страница /metrics читает сумму по всем процессам.
+
+Учитываются только представления приложений из METRICS_NAMESPACES:
+гистограммы времени ответа и числа SQL-запросов, счётчики кодов ответа,
+попаданий и промахов кеша страниц.
+"""
+import atexit
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+METRICS_NAMESPACES = ('posts', 'users', 'about', 'api')
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+PREFIX = 'yatube_'
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS metrics ('
+    ' name TEXT, labels TEXT, value REAL NOT NULL,'
+    ' PRIMARY KEY (name, labels))'
+)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class MetricsStore:
+    def __init__(self, path):
+        self.path = path
+        self.pending = Counter()
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self.path,
+                timeout=10,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def add(self, name, labels, value=1):
+        with self.lock:
+            self.pending[name, labels] += value
+
+    def observe(self, name, labels, value, buckets):
+        """Наблюдение гистограммы: бакеты хранятся накопительно."""
+        with self.lock:
+            # Нулевые приращения тоже пишутся: у гистограммы должны
+            # быть все бакеты.
+            for bound in buckets:
+                self.pending[
+                    f'{name}_bucket', f'{labels},le="{bound}"'
+                ] += 1 if value <= bound else 0
+            self.pending[f'{name}_bucket', f'{labels},le="+Inf"'] += 1
+            self.pending[f'{name}_sum', labels] += value
+            self.pending[f'{name}_count', labels] += 1
+
+    def maybe_flush(self, interval):
+        if time.monotonic() - self.last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        self.connection.executemany(
+            'INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?) '
+            'ON CONFLICT (name, labels) DO UPDATE '
+            'SET value = value + excluded.value',
+            [(name, labels, value) for (name, labels), value
+             in pending.items()]
+        )
+
+    def read(self):
+        """Значения всех процессов: {(имя, метки): значение}."""
+        self.flush()
+        return {
+            (name, labels): value
+            for name, labels, value in self.connection.execute(
+                'SELECT name, labels, value FROM metrics'
+            )
+        }
+
+
+def get_store():
+    path = settings.METRICS_PATH
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = MetricsStore(path)
+            atexit.register(_stores[path].flush)
+        return _stores[path]
+
+
+def observe(stats, status_code):
+    """Учитывает запрос по итогам из core.timing."""
+    view = stats['view']
+    if view is None or view.split(':')[0] not in METRICS_NAMESPACES:
+        return
+    store = get_store()
+    labels = f'view="{view}"'
+    store.observe(
+        'request_duration_seconds', labels, stats['total_ms'] / 1000,
+        DURATION_BUCKETS
+    )
+    store.observe(
+        'request_queries', labels, stats['queries'], QUERY_BUCKETS
+    )
+    store.add('responses_total', f'{labels},status="{status_code}"')
+    store.add('cache_hits_total', labels, stats['cache_hits'])
+    store.add('cache_misses_total', labels, stats['cache_misses'])
+    store.maybe_flush(settings.METRICS_FLUSH_INTERVAL)
+
+
+METRICS = (
+    ('request_duration_seconds', 'histogram',
+     'Время ответа представления'),
+    ('request_queries', 'histogram', 'Число SQL-запросов на ответ'),
+    ('responses_total', 'counter', 'Ответы по кодам'),
+    ('cache_hits_total', 'counter', 'Ответы из кеша страниц'),
+    ('cache_misses_total', 'counter', 'Пересчёты страниц'),
+    ('cache_hit_ratio', 'gauge', 'Доля ответов из кеша страниц'),
+)
+
+
+def format_value(value):
+    if value == math.floor(value):
+        return str(int(value))
+    return repr(value)
+
+
+def bucket_order(labels):
+    bound = labels.rsplit('le="', 1)[-1].rstrip('"')
+    return math.inf if bound == '+Inf' else float(bound)
+
+
+def hit_ratios(values):
+    ratios = {}
+    for (name, labels), hits in values.items():
+        if name != 'cache_hits_total':
+            continue
+        total = hits + values.get(('cache_misses_total', labels), 0)
+        if total:
+            ratios['cache_hit_ratio', labels] = hits / total
+    return ratios
+
+
+def render():
+    """Текст страницы /metrics в формате экспозиции Prometheus."""
+    values = get_store().read()
+    values.update(hit_ratios(values))
+    lines = []
+    for metric, kind, help_text in METRICS:
+        lines.append(f'# HELP {PREFIX}{metric} {help_text}')
+        lines.append(f'# TYPE {PREFIX}{metric} {kind}')
+        series = [
+            (name, labels, value) for (name, labels), value in values.items()
+            if name == metric or kind == 'histogram' and name in (
+                f'{metric}_bucket', f'{metric}_sum', f'{metric}_count'
+            )
+        ]
+        series.sort(key=lambda item: (
+            item[1].split(',')[0], item[0],
+            bucket_order(item[1]) if item[0].endswith('_bucket') else 0,
+            item[1]
+        ))
+        for name, labels, value in series:
+            lines.append(
+                f'{PREFIX}{name}{{{labels}}} {format_value(value)}'
+            )
+    return '\n'.join(lines) + '\n'
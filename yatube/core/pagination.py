@@ -0,0 +1,114 @@
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+# Ключ вне диапазона INTEGER SQLite не передать в запрос.
+MAX_KEY = 2 ** 63 - 1
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу (дата, id) без OFFSET и COUNT(*).
+
+    Страница выбирается по непрозрачному курсору, а не по номеру, поэтому
+    глубокие страницы стоят столько же, сколько первая. Возвращает обычный
+    `Page` с дополнительными атрибутами `next_cursor` и `previous_cursor`;
+    номер страницы при этом неизвестен (`number` равен None).
+    Вторым полем ключа вместо pk может быть другое уникальное поле.
+    """
+
+    def __init__(self, object_list, per_page, date_field='pub_date',
+                 descending=True, key_field='pk'):
+        super().__init__(object_list, per_page)
+        self.date_field = date_field
+        self.descending = descending
+        self.key_field = key_field
+
+    def encode_value(self, value):
+        return value.isoformat()
+
+    def decode_value(self, raw):
+        return parse_datetime(raw)
+
+    def encode_cursor(self, direction, obj):
+        value = self.encode_value(getattr(obj, self.date_field))
+        raw = f'{direction}|{value}|{getattr(obj, self.key_field)}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, value, pk = raw.decode().split('|')
+            value = self.decode_value(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if direction not in (NEXT, PREVIOUS) or value is None:
+            return None
+        if not -MAX_KEY - 1 <= pk <= MAX_KEY:
+            return None
+        return direction, value, pk
+
+    def ordering(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return (f'{prefix}{self.date_field}', f'{prefix}{self.key_field}')
+
+    def beyond(self, value, pk, reverse=False):
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.date_field}__{lookup}': value})
+            | Q(**{self.date_field: value, f'{self.key_field}__{lookup}': pk})
+        )
+
+    def fetch(self, value=None, pk=None, reverse=False):
+        queryset = self.object_list.order_by(*self.ordering(reverse))
+        if value is not None:
+            queryset = queryset.filter(self.beyond(value, pk, reverse))
+        items = list(queryset[:self.per_page + 1])
+        return items[:self.per_page], len(items) > self.per_page
+
+    def get_page(self, cursor=None):
+        position = self.decode_cursor(cursor)
+        next_cursor = previous_cursor = None
+        if position is None:
+            items, has_more = self.fetch()
+            if has_more:
+                next_cursor = self.encode_cursor(NEXT, items[-1])
+        elif position[0] == NEXT:
+            items, has_more = self.fetch(*position[1:])
+            if items:
+                previous_cursor = self.encode_cursor(PREVIOUS, items[0])
+                if has_more:
+                    next_cursor = self.encode_cursor(NEXT, items[-1])
+        else:
+            items, has_more = self.fetch(*position[1:], reverse=True)
+            items.reverse()
+            if items:
+                next_cursor = self.encode_cursor(NEXT, items[-1])
+                if has_more:
+                    previous_cursor = self.encode_cursor(PREVIOUS, items[0])
+        page = self._get_page(items, None, self)
+        page.next_cursor = next_cursor
+        page.previous_cursor = previous_cursor
+        return page
+
+
+class ScoreCursorPaginator(CursorPaginator):
+    """Паджинатор по ключу (число, id), например по релевантности поиска."""
+
+    def __init__(self, object_list, per_page, score_field, descending=False):
+        super().__init__(object_list, per_page, score_field, descending)
+
+    def encode_value(self, value):
+        # repr восстанавливает float без потери точности.
+        return repr(value)
+
+    def decode_value(self, raw):
+        return float(raw)
@@ -0,0 +1,175 @@
+"""Чтение из реплик базы данных с гарантией «видно своё».
+
+Реплики — копии основной базы только для чтения, перечисленные в
+DATABASE_REPLICAS. PrimaryReplicaRouter отправляет чтение на случайную
+реплику, только пока обрабатывается одно из REPLICA_VIEWS; всё остальное
+чтение и любая запись идут в основную базу.
+
+Реплика может отставать, поэтому после запроса, который что-то записал
+(новый пост, правка, комментарий, подписка), ReplicationMiddleware ставит
+cookie: следующие REPLICA_STICKY_SECONDS секунд этот пользователь читает
+только из основной базы и видит свои изменения.
+
+Страницы лент кешируются по поколениям (core.caching), а их ETag
+считается из данных (core.conditional). Страница, собранная из отстающей
+реплики, попала бы в кеш под новым поколением. Поэтому реплика годится для
+чтения, только если в ней есть все изменения лент: постов, групп,
+комментариев и подписок. Обработчики сигналов posts вызывают
+mark_written(), и после фиксации транзакции позиция репликации
+сдвигается; sync_replicas запоминает, до какой позиции скопирована каждая
+реплика. Прочие записи (сессии, last_login, миниатюры) реплики свежими
+не делают и не портят.
+
+Для SQLite реплики — файлы, которые обновляет команда sync_replicas.
+"""
+import random
+import sqlite3
+import time
+from contextlib import closing
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import caching
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'primary_until'
+REPLICA_VIEWS = frozenset({
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+})
+# Сессию нельзя читать с отстающей реплики: не найдя её, SessionMiddleware
+# удалит cookie сессии, и пользователь окажется разлогинен.
+PRIMARY_ONLY_APPS = frozenset({'sessions'})
+REPLICATION_SCOPE = 'replication'
+SYNCED_KEY = 'replica_synced:{}'
+
+_current = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, sticky):
+        # Пользователь недавно писал и должен читать из основной базы.
+        self.sticky = sticky
+        # Реплика, из которой читает этот запрос, или None.
+        self.replica = None
+        self.wrote = False
+
+
+def is_sticky(request):
+    try:
+        return float(request.COOKIES[STICKY_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
+
+def replication_position():
+    return caching.get_generations([REPLICATION_SCOPE])[0]
+
+
+def mark_written(using=PRIMARY):
+    """Сдвигает позицию репликации, когда изменение лент зафиксировано."""
+    if settings.DATABASE_REPLICAS:
+        transaction.on_commit(
+            lambda: caching.bump(REPLICATION_SCOPE), using=using
+        )
+
+
+def fresh_replicas():
+    """Реплики, скопированные после последнего изменения лент."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return []
+    position = replication_position()
+    synced = cache.get_many([SYNCED_KEY.format(alias) for alias in replicas])
+    return [
+        alias for alias in replicas
+        if synced.get(SYNCED_KEY.format(alias)) == position
+    ]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if (
+            state is not None
+            and state.replica is not None
+            and model._meta.app_label not in PRIMARY_ONLY_APPS
+        ):
+            return state.replica
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(sticky=is_sticky(request))
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if state.wrote:
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time()) + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _current.get()
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        if state is None or state.sticky or view_name not in REPLICA_VIEWS:
+            return
+        replicas = fresh_replicas()
+        state.replica = random.choice(replicas) if replicas else None
+
+
+def sync_replica(source, target):
+    """Копирует файл SQLite в реплику через backup API.
+
+    Копия согласованная, даже если в основную базу в это время пишут.
+    """
+    with closing(sqlite3.connect(source)) as primary:
+        with closing(sqlite3.connect(target)) as replica:
+            primary.backup(replica)
+
+
+def sync(alias):
+    """Обновляет реплику и запоминает скопированную позицию."""
+    # Позиция берётся до копирования: запись, зафиксированная во время
+    # копирования, сдвинет её, и реплика не будет считаться свежей.
+    position = replication_position()
+    sync_replica(
+        settings.DATABASES[PRIMARY]['NAME'],
+        settings.DATABASES[alias]['NAME']
+    )
+    cache.set(SYNCED_KEY.format(alias), position, None)
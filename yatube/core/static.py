@@ -0,0 +1,80 @@
+"""Раздача собранной статики без отдельного веб-сервера.
+
+StaticFilesMiddleware отвечает на запросы к STATIC_URL файлами из
+STATIC_ROOT. Клиенту, принимающему gzip, отдаётся заранее сжатая копия
+`.gz` (см. core.storage). Файлы с хешем в имени из манифеста не меняются,
+поэтому кешируются браузером на год без перепроверки; остальные — на
+STATIC_MAX_AGE секунд с проверкой по Last-Modified.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_MAX_AGE = 60
+
+
+def hashed_names():
+    """Имена файлов с хешем из манифеста хранилища статики."""
+    return set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.immutable = hashed_names()
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            name = request.path_info[len(self.prefix):]
+            response = self.serve(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        immutable = name in self.immutable
+        stat = os.stat(path)
+        if not immutable and not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime,
+            stat.st_size
+        ):
+            return HttpResponseNotModified()
+        content_type, _ = mimetypes.guess_type(path)
+        encoding = None
+        accepts = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if 'gzip' in accepts and os.path.isfile(f'{path}.gz'):
+            path = f'{path}.gz'
+            encoding = 'gzip'
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream'
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if immutable:
+            response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
+        return response
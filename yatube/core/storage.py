@@ -0,0 +1,39 @@
+"""Хранилище статики с хешами в именах и сжатыми копиями файлов.
+
+Рядом с каждым текстовым файлом collectstatic кладёт копию `.gz`, если
+она меньше оригинала; её отдаёт core.static.StaticFilesMiddleware.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.json', '.xml', '.html'
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        processed_paths = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            processed_paths.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for path in processed_paths:
+            if path and path.endswith(COMPRESS_EXTENSIONS):
+                self.compress(path)
+
+    def compress(self, path):
+        with self.open(path) as original:
+            content = original.read()
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) >= len(content):
+            return
+        gz_path = f'{path}.gz'
+        if self.exists(gz_path):
+            self.delete(gz_path)
+        self._save(gz_path, ContentFile(compressed))
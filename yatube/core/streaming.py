@@ -0,0 +1,103 @@
+"""Потоковая отдача длинных страниц со сжатием gzip.
+
+Шаблон страницы рендерится без списка элементов: вместо него выводится
+ITEMS_MARKER. Всё до маркера (head и шапка сайта) уходит клиенту сразу,
+затем по одному идут элементы, отрендеренные шаблоном элемента, и в конце
+остаток страницы. Каждый кусок сжимается и сбрасывается из zlib, чтобы
+браузер мог показывать страницу по мере получения.
+
+Поток включается только для клиентов, принимающих gzip, и только если
+элементы есть; иначе страница рендерится обычным render(). В обоих
+случаях ответ зависит от Accept-Encoding и несёт Vary с ним.
+"""
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import get_template, render_to_string
+from django.utils.cache import patch_vary_headers
+
+ITEMS_MARKER = '<!-- stream:items -->'
+GZIP_LEVEL = 6
+# 16 + размер окна: zlib пишет формат gzip с заголовком.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepts_gzip(request):
+    """Принимает ли клиент gzip с учётом q-значений Accept-Encoding.
+
+    q=0 — явный отказ; `*` относится к gzip, если он не назван отдельно.
+    """
+    qualities = {}
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+def gzip_stream(chunks, level=GZIP_LEVEL):
+    """Сжимает последовательность байтов, сбрасывая буфер после каждой."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def render_chunks(head, tail, items, item_template, context, request,
+                  item_name):
+    """Куски страницы: начало, элементы по одному, окончание."""
+    yield head
+    template = get_template(item_template)
+    total = len(items)
+    for counter, item in enumerate(items, 1):
+        # Шаблон элемента тот же, что включается в цикл страницы,
+        # поэтому вместо настоящего forloop ему передаётся его замена.
+        yield template.render(
+            {
+                **context,
+                item_name: item,
+                'forloop': {
+                    'counter': counter,
+                    'first': counter == 1,
+                    'last': counter == total,
+                },
+            },
+            request
+        )
+    yield tail
+
+
+def render_stream(request, template_name, context, items, item_template,
+                  item_name='post'):
+    """Как render(), но отдаёт страницу потоком, если это имеет смысл.
+
+    Оболочка страницы рендерится сразу, чтобы ошибки в ней давали обычный
+    ответ 500, а не оборванный поток.
+    """
+    if not items or not accepts_gzip(request):
+        response = render(request, template_name, context)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+    shell = render_to_string(
+        template_name, {**context, 'stream_items': True}, request
+    )
+    head, tail = shell.split(ITEMS_MARKER, 1)
+    chunks = render_chunks(
+        head, tail, items, item_template, context, request, item_name
+    )
+    response = StreamingHttpResponse(
+        gzip_stream(chunk.encode() for chunk in chunks)
+    )
+    response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
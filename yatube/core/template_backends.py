@@ -0,0 +1,22 @@
+"""Шаблонизатор Django с замером времени рендеринга для Server-Timing."""
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from core import timing
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timing.measure('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
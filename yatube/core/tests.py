@@ -0,0 +1,670 @@
+import gzip
+import logging
+import os
+import sqlite3
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from posts.models import Group, Post, User
+
+from core import benchmark, caching, metrics, replicas, warmup
+from core.static import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+from core.cache_backends import CULL_CHECK_EVERY, LocalTier, TwoTierCache
+
+THREADS = 8
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def compute(self):
+        with self.lock:
+            self.calls += 1
+            number = self.calls
+        time.sleep(0.2)
+        return number
+
+    def run_concurrently(self, timeout, beta=0):
+        with ThreadPoolExecutor(THREADS) as pool:
+            return list(pool.map(
+                lambda _: caching.get_or_compute(
+                    'key', self.compute, timeout, beta=beta
+                ),
+                range(THREADS)
+            ))
+
+    def test_single_recomputation_on_miss(self):
+        """Проверка, что при промахе значение считается один раз."""
+        results = self.run_concurrently(timeout=60)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [1] * THREADS)
+
+    def test_single_recomputation_per_expiry(self):
+        """Проверка, что после устаревания пересчёт идёт один раз."""
+        self.run_concurrently(timeout=0.1)
+        time.sleep(0.2)
+        results = self.run_concurrently(timeout=0.1)
+        self.assertEqual(self.calls, 2)
+        self.assertIn(2, results)
+        self.assertTrue(set(results) <= {1, 2})
+
+    def test_early_expiry(self):
+        """Проверка, что большой beta обновляет значение до истечения TTL."""
+        caching.get_or_compute('key', self.compute, 60)
+        caching.get_or_compute('key', self.compute, 60, beta=10 ** 6)
+        self.assertEqual(self.calls, 2)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.location = os.path.join(directory, 'cache.sqlite3')
+        self.params = {'OPTIONS': {'SYNC_INTERVAL': 0, 'MAX_ENTRIES': 10}}
+        self.first = TwoTierCache(self.location, self.params)
+        self.second = self.other_process()
+
+    def other_process(self):
+        """Экземпляр со своей памятью процесса над тем же файлом."""
+        backend = TwoTierCache(self.location, self.params)
+        backend._tier = LocalTier(max_entries=100)
+        return backend
+
+    def test_values_are_shared_between_processes(self):
+        """Проверка, что значение из одного процесса видно в другом."""
+        self.first.set('key', 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(self.second.get_stats()['shared_hits'], 1)
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(self.second.get_stats()['local_hits'], 1)
+
+    def test_invalidation_reaches_other_process(self):
+        """Проверка, что запись сбрасывает память другого процесса."""
+        self.first.set('key', 'old')
+        self.assertEqual(self.second.get('key'), 'old')
+        self.first.set('key', 'new')
+        self.assertEqual(self.second.get('key'), 'new')
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+        self.second.set('other', 1)
+        self.first.clear()
+        self.assertIsNone(self.second.get('other'))
+
+    def test_add_and_incr_are_shared(self):
+        """Проверка атомарных add и incr на общем уровне."""
+        self.assertTrue(self.first.add('counter', 1))
+        self.assertFalse(self.second.add('counter', 5))
+        self.assertEqual(self.second.incr('counter'), 2)
+        self.assertEqual(self.first.get('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.first.incr('missing')
+
+    def test_ttl(self):
+        """Проверка истечения срока жизни значения."""
+        self.first.set('key', 'value', timeout=0.1)
+        self.assertEqual(self.first.get_many(['key']), {'key': 'value'})
+        time.sleep(0.2)
+        self.assertIsNone(self.first.get('key'))
+        self.assertTrue(self.first.add('key', 'again'))
+
+    def test_size_is_bounded(self):
+        """Проверка вытеснения лишних записей из общего файла."""
+        max_entries = self.params['OPTIONS']['MAX_ENTRIES']
+        for cycle in range(5):
+            for number in range(CULL_CHECK_EVERY):
+                self.first.set(f'key-{cycle}-{number}', number)
+            stored = self.first.connection.execute(
+                'SELECT COUNT(*) FROM cache'
+            ).fetchone()[0]
+            with self.subTest(cycle=cycle):
+                self.assertGreater(stored, 0)
+                self.assertLessEqual(stored, max_entries)
+        self.assertGreater(self.first.get_stats()['shared_evictions'], 0)
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class BenchmarkTests(TestCase):
+    def test_every_route_is_measured(self):
+        """Проверка замеров всех маршрутов приложений."""
+        call_command(
+            'seed', users=5, groups=2, posts=20, comments=10, follows=5,
+            seed=1, stdout=StringIO()
+        )
+        results = benchmark.run(requests=2)
+        self.assertEqual(
+            set(results), {name for name, _ in benchmark.routes()}
+        )
+        self.assertIn('posts:post_detail', results)
+        for name, stats in results.items():
+            with self.subTest(route=name):
+                self.assertLess(stats['status'], 400)
+                self.assertGreater(stats['queries'], 0)
+                self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+
+    def test_compare_with_baseline(self):
+        """Проверка поиска регрессий по времени и числу запросов."""
+        stats = {'p50_ms': 10, 'queries': 3}
+        baseline = {'1000': {
+            'posts:index': stats,
+            'posts:profile': stats,
+            'posts:search': stats,
+        }}
+        results = {'1000': {
+            'posts:index': {'p50_ms': 12, 'queries': 3},
+            'posts:profile': {'p50_ms': 13, 'queries': 3},
+            'posts:search': {'p50_ms': 5, 'queries': 4},
+            'posts:group_list': {'p50_ms': 100, 'queries': 10},
+        }}
+        regressions = benchmark.compare(results, baseline, threshold=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('posts:profile', regressions[0])
+        self.assertIn('posts:search', regressions[1])
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_header_and_log_line(self):
+        """Проверка заголовка Server-Timing и строки лога запроса."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'template;dur=', 'cache;', 'total;dur='):
+            self.assertIn(metric, header)
+        self.assertIn(f'desc="{len(queries)} queries"', header)
+        record = logs.records[0]
+        self.assertEqual(record.timing['view'], 'posts:index')
+        self.assertEqual(record.timing['queries'], len(queries))
+        self.assertGreater(record.timing['template_ms'], 0)
+        self.assertEqual(record.timing['cache_hits'], 0)
+        self.assertEqual(record.timing['cache_misses'], 1)
+        self.assertIn('view=posts:index', record.getMessage())
+
+    def test_streamed_page_recorded_after_body(self):
+        """Проверка, что потоковый ответ учитывается после отдачи тела."""
+        author = User.objects.create(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author) for number in range(3)
+        )
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(
+                reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+            )
+            self.assertTrue(response.streaming)
+            self.assertNotIn('Server-Timing', response)
+            self.assertEqual(logs.records, [])
+            b''.join(response.streaming_content)
+        self.assertEqual(len(logs.records), 1)
+        stats = logs.records[0].timing
+        self.assertEqual(stats['view'], 'posts:index')
+        self.assertGreater(stats['template_ms'], 0)
+
+    def test_log_line_kept_without_debug(self):
+        """Проверка обработчика без DEBUG с уровнем из настроек."""
+        logger = logging.getLogger('core.timing')
+        record = logger.makeRecord(
+            logger.name, logging.INFO, __file__, 0, 'view=x', (), None
+        )
+        self.assertFalse(settings.DEBUG)
+        handler, = logger.handlers
+        self.assertTrue(handler.filter(record))
+        self.assertEqual(
+            handler.level, logging.getLevelName(settings.TIMING_LOG_LEVEL)
+        )
+
+    def test_cache_hits_are_counted(self):
+        """Проверка подсчёта попаданий в кеш страниц при любом бэкенде."""
+        for backend in (
+            'core.cache_backends.TwoTierCache',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ):
+            with self.subTest(backend=backend):
+                location = tempfile.mkdtemp()
+                self.addCleanup(shutil.rmtree, location)
+                caches = {'default': {
+                    'BACKEND': backend,
+                    'LOCATION': os.path.join(location, 'cache.sqlite3'),
+                }}
+                with override_settings(CACHES=caches):
+                    self.client.get(reverse('posts:index'))
+                    with self.assertLogs('core.timing', 'INFO') as logs:
+                        self.client.get(reverse('posts:index'))
+                stats = logs.records[0].timing
+                self.assertEqual(stats['cache_hits'], 1)
+                self.assertEqual(stats['cache_misses'], 0)
+                self.assertEqual(stats['template_ms'], 0)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'metrics.sqlite3')
+        settings = override_settings(
+            METRICS_PATH=self.path, METRICS_FLUSH_INTERVAL=0
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_endpoint_exposes_view_metrics(self):
+        """Проверка метрик представлений на странице /metrics."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        lines = response.content.decode().splitlines()
+        labels = '{view="posts:index"'
+        for line in (
+            f'yatube_responses_total{labels},status="200"}} 2',
+            f'yatube_request_duration_seconds_bucket{labels},le="+Inf"}} 2',
+            f'yatube_request_duration_seconds_count{labels}}} 2',
+            f'yatube_request_queries_count{labels}}} 2',
+            '# TYPE yatube_request_queries histogram',
+        ):
+            self.assertIn(line, lines)
+        self.assertTrue(any(
+            line.startswith(f'yatube_cache_hit_ratio{labels}')
+            for line in lines
+        ))
+        self.assertNotIn('view="metrics"', response.content.decode())
+
+    def test_endpoint_closed_to_strangers(self):
+        """Проверка, что /metrics видят только свои адреса и сотрудники."""
+        remote = {'REMOTE_ADDR': '203.0.113.5'}
+        response = self.client.get('/metrics', **remote)
+        self.assertEqual(response.status_code, 403)
+        user = User.objects.create_user('user')
+        self.client.force_login(user)
+        response = self.client.get('/metrics', **remote)
+        self.assertEqual(response.status_code, 403)
+        user.is_staff = True
+        user.save()
+        response = self.client.get('/metrics', **remote)
+        self.assertEqual(response.status_code, 200)
+
+    def test_counters_are_summed_across_processes(self):
+        """Проверка сложения счётчиков разных процессов в общем файле."""
+        first = metrics.MetricsStore(self.path)
+        second = metrics.MetricsStore(self.path)
+        first.add('responses_total', 'view="about:tech"', 2)
+        second.add('responses_total', 'view="about:tech"', 3)
+        second.observe('request_queries', 'view="about:tech"', 4, (1, 5))
+        first.flush()
+        second.flush()
+        values = metrics.MetricsStore(self.path).read()
+        self.assertEqual(values['responses_total', 'view="about:tech"'], 5)
+        self.assertEqual(
+            values['request_queries_bucket', 'view="about:tech",le="1"'], 0
+        )
+        self.assertEqual(
+            values['request_queries_bucket', 'view="about:tech",le="5"'], 1
+        )
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create(username='author')
+        self.group = Group.objects.create(
+            title='Тестовое название',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Post.objects.create(text='Пост', author=author, group=self.group)
+
+    def test_templates_and_urls(self):
+        """Проверка разбора всех шаблонов и построения резолверов."""
+        self.assertGreater(warmup.compile_templates(), 0)
+        self.assertGreaterEqual(
+            warmup.resolve_urls(), len(benchmark.ROUTE_MODULES)
+        )
+
+    def test_prerendered_pages_come_from_cache(self):
+        """Проверка, что после прогрева страницы берутся из кеша."""
+        self.assertEqual(warmup.prerender_pages(), 2)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+        ):
+            with self.subTest(url=url):
+                for encoding in warmup.PRERENDER_ENCODINGS:
+                    with self.assertLogs('core.timing', 'INFO') as logs:
+                        response = self.client.get(
+                            url, HTTP_ACCEPT_ENCODING=encoding
+                        )
+                    self.assertFalse(response.streaming)
+                    self.assertEqual(
+                        logs.records[0].timing['template_ms'], 0
+                    )
+                body = gzip.decompress(response.content).decode()
+                self.assertIn('Пост', body)
+
+    def test_production_settings_cache_templates(self):
+        """Проверка кеширующего загрузчика в боевых настройках."""
+        from yatube import settings_production
+
+        self.assertFalse(settings_production.DEBUG)
+        loaders = settings_production.TEMPLATES[0]['OPTIONS']['loaders']
+        self.assertEqual(
+            loaders[0][0], 'django.template.loaders.cached.Loader'
+        )
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings = override_settings(
+            STATIC_ROOT=root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            )
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.root = root
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse(status=404)
+        )
+        self.factory = RequestFactory()
+        manifest = self.middleware.immutable
+        self.css = next(
+            name for name in manifest
+            if name.startswith('css/bootstrap.min.')
+        )
+
+    def get(self, name, **headers):
+        return self.middleware(self.factory.get(f'/static/{name}', **headers))
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """Проверка сжатых копий рядом с файлами с хешем."""
+        path = os.path.join(self.root, self.css)
+        with open(path, 'rb') as original, open(f'{path}.gz', 'rb') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), original.read())
+        self.assertFalse(
+            os.path.exists(os.path.join(self.root, 'img/logo.png.gz'))
+        )
+
+    def test_hashed_files_are_immutable_and_compressed(self):
+        """Проверка отдачи сжатой копии с неизменяемым кешированием."""
+        response = self.get(self.css, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        response = self.get(self.css)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_plain_names_are_revalidated(self):
+        """Проверка короткого кеширования файлов без хеша."""
+        response = self.get('css/bootstrap.min.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.get(
+            'css/bootstrap.min.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_paths_fall_through(self):
+        """Проверка, что чужие и отсутствующие пути уходят дальше."""
+        for name in ('missing.css', '../manage.py'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1', 'replica2'],
+    REPLICA_STICKY_SECONDS=10
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = replicas.PrimaryReplicaRouter()
+        cache.clear()
+        self.mark_synced('replica1', 'replica2')
+
+    def mark_synced(self, *aliases):
+        position = replicas.replication_position()
+        for alias in aliases:
+            cache.set(replicas.SYNCED_KEY.format(alias), position, None)
+
+    def handle(self, path, write=False, **cookies):
+        """Проходит через middleware так же, как обработчик Django."""
+        request = self.factory.get(path)
+        request.COOKIES.update(cookies)
+        used = {}
+
+        def get_response(request):
+            request.resolver_match = resolve(request.path_info)
+            middleware.process_view(request, None, (), {})
+            used['read'] = self.router.db_for_read(Post)
+            used['session'] = self.router.db_for_read(Session)
+            if write:
+                used['write'] = self.router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = replicas.ReplicationMiddleware(get_response)
+        return middleware(request), used
+
+    def test_read_views_use_replica(self):
+        """Проверка, что ленты читают из реплики, остальное — из основной."""
+        _, used = self.handle(reverse('posts:index'))
+        self.assertIn(used['read'], ('replica1', 'replica2'))
+        self.assertEqual(used['session'], 'default')
+        _, used = self.handle(reverse('posts:post_create'))
+        self.assertEqual(used['read'], 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_makes_reads_sticky(self):
+        """Проверка, что после записи пользователь читает из основной."""
+        response, used = self.handle(reverse('posts:post_create'), True)
+        self.assertEqual(used['write'], 'default')
+        cookie = response.cookies[replicas.STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+        _, used = self.handle(
+            reverse('posts:index'),
+            **{replicas.STICKY_COOKIE: cookie.value}
+        )
+        self.assertEqual(used['read'], 'default')
+        _, used = self.handle(
+            reverse('posts:index'),
+            **{replicas.STICKY_COOKIE: str(int(time.time()) - 1)}
+        )
+        self.assertIn(used['read'], ('replica1', 'replica2'))
+
+    def test_reads_do_not_set_cookie(self):
+        """Проверка, что чтение не закрепляет пользователя за основной."""
+        response, _ = self.handle(reverse('posts:index'))
+        self.assertNotIn(replicas.STICKY_COOKIE, response.cookies)
+
+    def test_stale_replica_not_used(self):
+        """Проверка, что реплику без последних записей не читают."""
+        caching.bump(replicas.REPLICATION_SCOPE)
+        _, used = self.handle(reverse('posts:index'))
+        self.assertEqual(used['read'], 'default')
+        self.mark_synced('replica2')
+        for _ in range(5):
+            _, used = self.handle(reverse('posts:index'))
+            self.assertEqual(used['read'], 'replica2')
+
+    def test_replicas_not_migrated(self):
+        """Проверка, что миграции не применяются к репликам."""
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+    def test_sync_replica(self):
+        """Проверка копирования файла SQLite в реплику."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        source = os.path.join(root, 'db.sqlite3')
+        target = os.path.join(root, 'db.replica1.sqlite3')
+        with sqlite3.connect(source) as primary:
+            primary.execute('CREATE TABLE posts (text TEXT)')
+            primary.execute("INSERT INTO posts VALUES ('Пост')")
+        replicas.sync_replica(source, target)
+        with sqlite3.connect(target) as replica:
+            rows = replica.execute('SELECT text FROM posts').fetchall()
+        self.assertEqual(rows, [('Пост',)])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaFreshnessTests(TestCase):
+    """Какие записи делают реплики устаревшими."""
+
+    def setUp(self):
+        cache.clear()
+        # TestCase не фиксирует транзакции, поэтому колбэки on_commit
+        # выполняются сразу.
+        on_commit = mock.patch(
+            'core.replicas.transaction.on_commit',
+            side_effect=lambda callback, using=None: callback()
+        )
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+        self.user = User.objects.create_user('reader', password='pass')
+        position = replicas.replication_position()
+        for alias in settings.DATABASE_REPLICAS:
+            cache.set(replicas.SYNCED_KEY.format(alias), position, None)
+
+    def test_login_keeps_replicas_fresh(self):
+        """Проверка, что вход пользователя не уводит чтение с реплик."""
+        self.assertTrue(
+            self.client.login(username='reader', password='pass')
+        )
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(
+            replicas.fresh_replicas(), ['replica1', 'replica2']
+        )
+
+    def test_feed_changes_make_replicas_stale(self):
+        """Проверка, что новый пост уводит чтение с реплик до sync."""
+        Post.objects.create(text='Пост', author=self.user)
+        self.assertEqual(replicas.fresh_replicas(), [])
+
+
+class SQLiteConcurrencyTests(SimpleTestCase):
+    """Нагрузочная проверка: пачки записей не останавливают читателей."""
+    alias = 'stress'
+    writers = 2
+    readers = 4
+    duration = 1.5
+    burst = 200
+    max_read_seconds = 0.5
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        # Тестовая база в памяти, а WAL работает только с файлом.
+        connections.databases[self.alias] = {
+            **connections.databases['default'],
+            'NAME': os.path.join(root, 'stress.sqlite3'),
+        }
+        self.addCleanup(connections.databases.pop, self.alias)
+        self.addCleanup(connections.__delitem__, self.alias)
+        self.addCleanup(connections[self.alias].close)
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE entry (id INTEGER PRIMARY KEY, text TEXT)'
+            )
+
+    def test_pragmas_applied(self):
+        """Проверка PRAGMA нового соединения."""
+        expected = {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': 5000,
+            'cache_size': -64000,
+            'mmap_size': 256 * 1024 * 1024,
+        }
+        with connections[self.alias].cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+    def write_bursts(self):
+        try:
+            while not self.stop.is_set():
+                with transaction.atomic(using=self.alias):
+                    cursor = connections[self.alias].cursor()
+                    # Чтение перед записью: без BEGIN IMMEDIATE такая
+                    # транзакция падает на конкурирующем писателе.
+                    cursor.execute('SELECT COUNT(*) FROM entry')
+                    cursor.executemany(
+                        'INSERT INTO entry (text) VALUES (%s)',
+                        [('x' * 200,)] * self.burst
+                    )
+                    self.writing.set()
+                    time.sleep(0.01)
+                self.writing.clear()
+        except Exception as error:
+            self.errors.append(error)
+        finally:
+            connections[self.alias].close()
+
+    def read_feed(self):
+        try:
+            while not self.stop.is_set():
+                started = time.perf_counter()
+                with connections[self.alias].cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*), MAX(id) FROM entry')
+                    cursor.fetchone()
+                self.latencies.append(time.perf_counter() - started)
+                if self.writing.is_set():
+                    self.overlapped += 1
+        except Exception as error:
+            self.errors.append(error)
+        finally:
+            connections[self.alias].close()
+
+    def test_readers_progress_during_write_bursts(self):
+        """Проверка, что чтение идёт без ошибок, пока открыта запись."""
+        self.stop = threading.Event()
+        self.writing = threading.Event()
+        self.errors = []
+        self.latencies = []
+        self.overlapped = 0
+        threads = [
+            threading.Thread(target=self.write_bursts)
+            for _ in range(self.writers)
+        ] + [
+            threading.Thread(target=self.read_feed)
+            for _ in range(self.readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(self.duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.errors, [])
+        self.assertGreater(self.overlapped, 0)
+        self.assertLess(max(self.latencies), self.max_read_seconds)
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM entry')
+            self.assertGreater(cursor.fetchone()[0], 0)
@@ -0,0 +1,162 @@
+"""Замеры времени обработки запроса для заголовка Server-Timing.
+
+ServerTimingMiddleware заводит на время запроса объект RequestTimings и
+оборачивает выполнение SQL на всех соединениях. Шаблоны и кеш сами
+сообщают о своей работе через measure() и count(): вне запроса эти
+вызовы ничего не делают.
+
+Итог уходит в заголовок Server-Timing, одной строкой в лог core.timing
+с именем представления из resolver_match и в метрики core.metrics.
+
+Тело потокового ответа (core.streaming) рендерится уже после выхода из
+middleware, пока сервер отдаёт его клиенту. Такое тело оборачивается в
+TimedStream: каждый кусок считается в замер того же запроса, а итог
+уходит в лог и метрики, когда поток отдан целиком или закрыт. Заголовки
+к этому моменту уже отправлены, поэтому Server-Timing у потокового
+ответа нет.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Суммарное время по видам работы, в секундах.
+        self.durations = {'db': 0.0, 'template': 0.0}
+        self.counts = {'queries': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+    def as_dict(self, view_name):
+        total = time.perf_counter() - self.started
+        return {
+            'view': view_name,
+            'total_ms': round(total * 1000, 2),
+            **{
+                f'{name}_ms': round(duration * 1000, 2)
+                for name, duration in self.durations.items()
+            },
+            **self.counts,
+        }
+
+
+def measure_execute(execute, sql, params, many, context):
+    timings = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings.durations['db'] += time.perf_counter() - started
+            timings.counts['queries'] += 1
+
+
+@contextmanager
+def measure(name):
+    """Добавляет время блока к работе name текущего запроса."""
+    timings = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.durations[name] += time.perf_counter() - started
+
+
+def count(name, value=1):
+    timings = _current.get()
+    if timings is not None:
+        timings.counts[name] += value
+
+
+@contextmanager
+def timed(timings):
+    """Считает работу внутри блока в замер timings."""
+    token = _current.set(timings)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(measure_execute)
+                )
+            yield
+    finally:
+        _current.reset(token)
+
+
+class TimedStream:
+    """Тело потокового ответа, которое рендерится внутри замера запроса.
+
+    on_complete() вызывается один раз: когда тело отдано целиком или
+    когда ответ закрыт раньше.
+    """
+
+    def __init__(self, content, timings, on_complete):
+        self.content = content
+        self.timings = timings
+        self.on_complete = on_complete
+        self.completed = False
+
+    def __iter__(self):
+        iterator = iter(self.content)
+        while True:
+            with timed(self.timings):
+                chunk = next(iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+        self.close()
+
+    def close(self):
+        if not self.completed:
+            self.completed = True
+            self.on_complete()
+
+
+def server_timing_header(stats):
+    return ', '.join([
+        f'db;dur={stats["db_ms"]};desc="{stats["queries"]} queries"',
+        f'template;dur={stats["template_ms"]}',
+        f'cache;desc="{stats["cache_hits"]} hits, '
+        f'{stats["cache_misses"]} misses"',
+        f'total;dur={stats["total_ms"]}',
+    ])
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        with timed(timings):
+            response = self.get_response(request)
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        if response.streaming:
+            response.streaming_content = TimedStream(
+                response.streaming_content,
+                timings,
+                lambda: self.record(timings, view_name, response.status_code)
+            )
+            return response
+        stats = self.record(timings, view_name, response.status_code)
+        response['Server-Timing'] = server_timing_header(stats)
+        return response
+
+    def record(self, timings, view_name, status_code):
+        stats = timings.as_dict(view_name)
+        metrics.observe(stats, status_code)
+        logger.info(
+            ' '.join(f'{key}={value}' for key, value in stats.items()),
+            extra={'timing': stats}
+        )
+        return stats
@@ -0,0 +1,99 @@
+"""Прогрев процесса и кеша после деплоя.
+
+compile_templates() разбирает все шаблоны проекта, чтобы кеширующий
+загрузчик держал их готовыми; resolve_urls() строит все URL-резолверы;
+prerender_pages() кладёт в кеш страниц первые страницы главной и самых
+больших групп, какими их видит анонимный пользователь.
+
+Первые два шага действуют на текущий процесс, поэтому их стоит делать
+в каждом воркере (см. WARMUP_ON_START в yatube/wsgi.py). Кеш страниц
+общий, его достаточно заполнить один раз командой `manage.py warmup`.
+"""
+import logging
+import os
+
+from django.contrib.auth.models import AnonymousUser
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+from django.test import RequestFactory
+from django.urls import URLResolver, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+PRERENDER_GROUPS = 5
+PRERENDER_ENCODINGS = ('', 'gzip')
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            if file_name.endswith('.html'):
+                path = os.path.join(root, file_name)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def compile_templates():
+    """Загружает все шаблоны всех движков; возвращает их число."""
+    compiled = 0
+    for engine in engines.all():
+        # С явными загрузчиками APP_DIRS выключен, и template_dirs не
+        # содержит папок приложений, хотя загрузчик в них ищет.
+        directories = dict.fromkeys([
+            *engine.dirs, *get_app_template_dirs(engine.app_dirname)
+        ])
+        for directory in directories:
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError:
+                    logger.exception('Не удалось разобрать шаблон %s', name)
+                    continue
+                compiled += 1
+    return compiled
+
+
+def resolve_urls(resolver=None):
+    """Строит таблицы всех резолверов; возвращает число имён маршрутов."""
+    resolver = resolver or get_resolver()
+    # Обращение к reverse_dict заполняет таблицы резолвера.
+    named = sum(
+        1 for key in resolver.reverse_dict if isinstance(key, str)
+    )
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            named += resolve_urls(pattern)
+    return named
+
+
+def prerender_pages(groups=PRERENDER_GROUPS):
+    """Кладёт в кеш первые страницы главной и самых больших групп."""
+    from posts import views
+    from posts.models import Group
+
+    pages = [(views.index, reverse('posts:index'), {})]
+    for slug in Group.objects.order_by('-post_count').values_list(
+        'slug', flat=True
+    )[:groups]:
+        pages.append((
+            views.group_posts,
+            reverse('posts:group_list', kwargs={'slug': slug}),
+            {'slug': slug}
+        ))
+    factory = RequestFactory()
+    for view, url, kwargs in pages:
+        # Браузеры получают сжатый поток, и в кеше он лежит под своим
+        # ключом; туда он попадает, только когда отдан целиком.
+        for encoding in PRERENDER_ENCODINGS:
+            request = factory.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            request.user = AnonymousUser()
+            response = view(request, **kwargs)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            response.close()
+    return len(pages)
+
+
+def warm_process():
+    compile_templates()
+    resolve_urls()
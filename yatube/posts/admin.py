@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Group, Post, Comment, Follow
+from .search import to_match_query
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +17,12 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_editable = ('group',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по FTS5-индексу, а не LIKE по всей таблице.
+        if not to_match_query(search_term):
+            return queryset, False
+        return queryset.search(search_term), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
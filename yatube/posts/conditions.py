@@ -0,0 +1,95 @@
+"""Валидаторы для условных GET-запросов к лентам и постам.
+
+Last-Modified — дата самого свежего поста в ленте, а для страницы поста —
+время его последнего изменения или нового комментария.
+В ETag кроме неё входят поколения областей кеша из core.caching: они
+меняются при правке и удалении постов и при подписках, которые дату не
+двигают. Ещё в ETag входит пользователь, так как ответ зависит от того,
+кто его запрашивает.
+"""
+from django.db.models import OuterRef, Subquery
+
+from core import caching
+from core.conditional import make_etag
+from .models import Comment, Post, TimelineEntry
+
+
+def viewer_id(request):
+    user = request.user
+    return user.pk if user.is_authenticated else ''
+
+
+def newest_pub_date(posts):
+    return posts.order_by('-pub_date').values_list(
+        'pub_date', flat=True
+    ).first()
+
+
+def feed_validators(request, posts, scopes):
+    last_modified = newest_pub_date(posts.order_by())
+    etag = make_etag(
+        viewer_id(request), last_modified, *caching.get_generations(scopes)
+    )
+    return etag, last_modified
+
+
+def index(request):
+    return feed_validators(request, Post.objects.all(), ['posts', 'groups'])
+
+
+def group_posts(request, slug):
+    return feed_validators(
+        request,
+        Post.objects.filter(group__slug=slug),
+        [f'group:{slug}', 'groups']
+    )
+
+
+def profile(request, username):
+    return feed_validators(
+        request,
+        Post.objects.filter(author__username=username),
+        [f'author:{username}', 'groups']
+    )
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return None
+    # Дата берётся из материализованной ленты; посты авторов, читаемых
+    # напрямую, в неё не попадают, но меняют поколение области posts.
+    return feed_validators(
+        request,
+        TimelineEntry.objects.filter(user=request.user),
+        ['posts', f'author:{request.user.username}']
+    )
+
+
+def search(request):
+    # Выдача поиска зависит от всех постов сразу; даты для неё нет.
+    etag = make_etag(
+        viewer_id(request), *caching.get_generations(['posts', 'groups'])
+    )
+    return etag, None
+
+
+def post_detail(request, post_id):
+    last_comment = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by('-created').values('created')[:1]
+    row = Post.objects.filter(pk=post_id).annotate(
+        last_comment=Subquery(last_comment)
+    ).values_list(
+        'updated', 'comment_count', 'author__username', 'last_comment'
+    ).first()
+    if row is None:
+        return None
+    updated, comment_count, username, last_comment = row
+    last_modified = max(filter(None, (updated, last_comment)))
+    etag = make_etag(
+        viewer_id(request),
+        last_modified,
+        comment_count,
+        *caching.get_generations([f'author:{username}', 'groups'])
+    )
+    return etag, last_modified
@@ -0,0 +1,109 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарно через F-выражения; расхождения, накопленные
+мимо сигналов (например, после `bulk_create`), исправляет команда
+`manage.py repair_counters`.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def count_of(model, field):
+    """Подзапрос с количеством строк `model`, ссылающихся на объект."""
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+USER_COUNTERS = {
+    'post_count': (Post, 'author'),
+    'follower_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+POST_COUNTERS = {
+    'comment_count': (Comment, 'post'),
+}
+GROUP_COUNTERS = {
+    'post_count': (Post, 'group'),
+}
+
+
+def actual_counts(queryset, counters):
+    """Кортежи (pk, фактические значения счётчиков) для объектов."""
+    annotations = {
+        f'actual_{name}': count_of(model, field)
+        for name, (model, field) in counters.items()
+    }
+    return queryset.annotate(**annotations).values_list('pk', *annotations)
+
+
+def bump(model, pk, field, delta=1):
+    """Атомарно меняет счётчик; не уводит его ниже нуля."""
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def create_stats(user_id):
+    """Создаёт счётчики пользователя по фактическим данным."""
+    _, *counts = actual_counts(
+        User.objects.filter(pk=user_id), USER_COUNTERS
+    ).get()
+    stats, _ = UserStats.objects.get_or_create(
+        user_id=user_id,
+        defaults=dict(zip(USER_COUNTERS, counts))
+    )
+    return stats
+
+
+def bump_user(user_id, field, delta=1):
+    if not bump(UserStats, user_id, field, delta) and delta > 0:
+        create_stats(user_id)
+
+
+def get_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return create_stats(user.pk)
+
+
+def post_created(post):
+    bump_user(post.author_id, 'post_count')
+    if post.group_id:
+        bump(Group, post.group_id, 'post_count')
+
+
+def post_moved(old_group_id, new_group_id):
+    if old_group_id:
+        bump(Group, old_group_id, 'post_count', -1)
+    if new_group_id:
+        bump(Group, new_group_id, 'post_count')
+
+
+def post_deleted(post):
+    bump_user(post.author_id, 'post_count', -1)
+    if post.group_id:
+        bump(Group, post.group_id, 'post_count', -1)
+
+
+def comment_created(comment):
+    bump(Post, comment.post_id, 'comment_count')
+
+
+def comment_deleted(comment):
+    bump(Post, comment.post_id, 'comment_count', -1)
+
+
+def follow_created(follow):
+    bump_user(follow.author_id, 'follower_count')
+    bump_user(follow.user_id, 'following_count')
+
+
+def follow_deleted(follow):
+    bump_user(follow.author_id, 'follower_count', -1)
+    bump_user(follow.user_id, 'following_count', -1)
@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Post, Comment
+from .uploads import RejectedUpload, normalize
 
 
 class PostForm(forms.ModelForm):
@@ -12,6 +14,26 @@ class PostForm(forms.ModelForm):
             'image',
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Прерванную загрузку убираем из файлов, чтобы ImageField не
+        # пытался её открыть, а ошибку показываем в clean_image.
+        field_name = self.add_prefix('image')
+        self.rejected_image = self.files.get(field_name)
+        if isinstance(self.rejected_image, RejectedUpload):
+            self.files = self.files.copy()
+            del self.files[field_name]
+        else:
+            self.rejected_image = None
+
+    def clean_image(self):
+        if self.rejected_image is not None:
+            raise forms.ValidationError(self.rejected_image.error)
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return normalize(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnail_worker, thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Генерирует миниатюры картинок всех постов в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Сколько процессов использовать (по умолчанию по числу ядер)'
+        )
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Пропускать картинки, у которых готовы все варианты'
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='').order_by('image')
+            .values_list('image', flat=True).distinct().iterator()
+        )
+        if options['missing']:
+            names = (
+                name for name in names
+                if not self.is_complete(thumbnails.cached_thumbnail(name))
+            )
+        done = failed = 0
+        with thumbnails.create_executor(options['workers']) as executor:
+            for ok in executor.map(
+                thumbnail_worker.generate, names, chunksize=16
+            ):
+                if ok:
+                    done += 1
+                else:
+                    failed += 1
+        self.stdout.write(f'Готово: {done}, с ошибками: {failed}')
+
+    def is_complete(self, image):
+        return image is not None and image.complete
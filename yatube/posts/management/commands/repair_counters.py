@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import (
+    GROUP_COUNTERS, POST_COUNTERS, USER_COUNTERS, actual_counts
+)
+from posts.models import Group, Post, User, UserStats
+from posts.timeline import resume_fan_out
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с данными и чинит расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько объектов проверять за одну транзакцию'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя'
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        self.dry_run = options['dry_run']
+        fixed = {
+            'users': self.repair(
+                User, UserStats, 'stats', USER_COUNTERS,
+                on_repair=self.followers_repaired
+            ),
+            'posts': self.repair(Post, Post, None, POST_COUNTERS),
+            'groups': self.repair(Group, Group, None, GROUP_COUNTERS),
+        }
+        for name, total in fixed.items():
+            self.stdout.write(f'{name}: расхождений {total}')
+
+    def chunks(self, model):
+        last_pk = 0
+        while True:
+            pks = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:self.chunk_size]
+            )
+            if not pks:
+                return
+            yield pks
+            last_pk = pks[-1]
+
+    def followers_repaired(self, pk, stored, actual):
+        # Автор мог опуститься под порог fan-out, см. resume_fan_out.
+        index = list(USER_COUNTERS).index('follower_count')
+        if stored[index] is not None and stored[index] > actual[index]:
+            resume_fan_out(pk, stored[index] - actual[index])
+
+    def repair(self, model, counter_model, relation, counters,
+               on_repair=None):
+        total = 0
+        for pks in self.chunks(model):
+            actual = actual_counts(model.objects.filter(pk__in=pks), counters)
+            stored_fields = [
+                f'{relation}__{name}' if relation else name
+                for name in counters
+            ]
+            stored = {
+                row[0]: row[1:]
+                for row in model.objects.filter(pk__in=pks)
+                .values_list('pk', *stored_fields)
+            }
+            with transaction.atomic():
+                for pk, *values in actual:
+                    if stored[pk] == tuple(values):
+                        continue
+                    total += 1
+                    if self.dry_run:
+                        continue
+                    counter_model.objects.update_or_create(
+                        pk=pk,
+                        defaults=dict(zip(counters, values))
+                    )
+                    if on_repair is not None:
+                        on_repair(pk, stored[pk], values)
+        return total
@@ -0,0 +1,306 @@
+import random
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from PIL import Image
+
+from core import caching
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+WORDS = (
+    'кот пёс город море лес река гора дом окно утро вечер ночь зима лето '
+    'осень весна дорога поезд книга музыка кофе чай друг семья работа '
+    'отпуск солнце дождь снег ветер небо звезда парк улица мост сад '
+    'история новость фото праздник путешествие мечта идея проект код'
+).split()
+PASSWORD = 'seed-password'
+DAYS = 365
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now(_add), чтобы bulk_create записал свои даты."""
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными: пользователи, группы, '
+        'посты с неравномерной популярностью авторов, комментарии и '
+        'подписки со степенным распределением'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=0,
+            help='Сколько разных картинок-заглушек создать (0 — без картинок)'
+        )
+        parser.add_argument(
+            '--image-ratio',
+            type=float,
+            default=0.3,
+            help='Доля постов с картинкой'
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности авторов'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        # С DEBUG Django форматирует и пишет в лог каждый запрос со всеми
+        # параметрами, на bulk_create это дороже самой вставки.
+        with override_settings(DEBUG=False):
+            self.seed(options)
+
+    def seed(self, options):
+        self.random = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.zipf = options['zipf']
+        self.image_ratio = options['image_ratio']
+        # Префикс отличает данные запуска, команду можно звать повторно.
+        self.prefix = f'seed{uuid.uuid4().hex[:8]}_'
+        started = time.monotonic()
+
+        user_ids = self.create_users(options['users'])
+        popular = self.popularity(user_ids)
+        follows = self.plan_follows(popular, options['follows'])
+        group_ids = self.plan_groups(options['groups'])
+        posts = self.plan_posts(popular, group_ids, options['posts'])
+        comments = self.plan_comments(popular, posts, options['comments'])
+        images = self.create_images(options['images'])
+
+        group_ids = self.create_groups(group_ids, posts)
+        post_ids = self.create_posts(posts, group_ids, images, comments)
+        self.create_comments(comments, post_ids)
+        follow_ids = self.create_follows(follows)
+        self.create_stats(user_ids, posts, follows)
+        self.fill_timelines(*follow_ids)
+        caching.bump('posts', 'groups')
+
+        self.stdout.write(
+            f'Создано: пользователей {len(user_ids)}, групп {len(group_ids)}, '
+            f'постов {len(post_ids)}, комментариев {len(comments)}, '
+            f'подписок {len(follows)} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
+
+    def chunks(self, items):
+        for start in range(0, len(items), self.chunk_size):
+            yield items[start:start + self.chunk_size]
+
+    def bulk_create(self, model, objects, **kwargs):
+        for chunk in self.chunks(objects):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, **kwargs)
+
+    def popularity(self, user_ids):
+        """Выбор пользователей по закону Ципфа: первые в списке — звёзды."""
+        ranked = list(user_ids)
+        self.random.shuffle(ranked)
+        weights = (1 / rank ** self.zipf for rank in range(1, len(ranked) + 1))
+        cum_weights = list(accumulate(weights))
+        return lambda k: self.random.choices(
+            ranked, cum_weights=cum_weights, k=k
+        )
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        self.bulk_create(User, [
+            User(
+                username=f'{self.prefix}{number}',
+                first_name='Пользователь',
+                last_name=str(number),
+                password=password
+            )
+            for number in range(count)
+        ])
+        return list(
+            User.objects.filter(username__startswith=self.prefix)
+            .values_list('id', flat=True)
+        )
+
+    def plan_follows(self, popular, count, attempts=10):
+        # И подписчики, и авторы выбираются по популярности: входящие и
+        # исходящие степени графа получаются степенными. Повторы пар
+        # отбрасываются, поэтому выборка идёт в несколько заходов.
+        follows = set()
+        for _ in range(attempts):
+            missing = count - len(follows)
+            if missing <= 0:
+                break
+            follows.update(
+                (user, author)
+                for user, author in zip(popular(missing), popular(missing))
+                if user != author
+            )
+        return list(follows)[:count]
+
+    def plan_groups(self, count):
+        return [f'{self.prefix}{number}' for number in range(count)]
+
+    def plan_posts(self, popular, group_slugs, count):
+        now = timezone.now()
+        offsets = sorted(
+            (self.random.random() * DAYS for _ in range(count)),
+            reverse=True
+        )
+        authors = popular(count)
+        # Часть постов публикуется без группы.
+        groups = group_slugs + [None]
+        return [
+            (
+                author,
+                self.random.choice(groups),
+                now - timedelta(days=offset),
+                ' '.join(self.random.choices(
+                    WORDS, k=self.random.randint(5, 40)
+                ))
+            )
+            for author, offset in zip(authors, offsets)
+        ]
+
+    def plan_comments(self, popular, posts, count):
+        if not posts:
+            return []
+        now = timezone.now()
+        comments = []
+        for author in popular(count):
+            index = self.random.randrange(len(posts))
+            pub_date = posts[index][2]
+            # Комментарий пишется между публикацией поста и текущим моментом.
+            created = pub_date + (now - pub_date) * self.random.random()
+            comments.append((index, author, created))
+        return comments
+
+    def create_images(self, count):
+        names = []
+        for number in range(count):
+            output = BytesIO()
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            Image.new('RGB', (960, 640), color).save(output, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{self.prefix}{number}.jpg',
+                ContentFile(output.getvalue())
+            ))
+        return names
+
+    def create_groups(self, slugs, posts):
+        post_counts = Counter(group for _, group, _, _ in posts)
+        self.bulk_create(Group, [
+            Group(
+                title=f'Группа {number}',
+                slug=slug,
+                description='Сгенерированная группа',
+                post_count=post_counts[slug]
+            )
+            for number, slug in enumerate(slugs)
+        ])
+        return dict(
+            Group.objects.filter(slug__in=slugs).values_list('slug', 'id')
+        )
+
+    def create_posts(self, posts, group_ids, images, comments):
+        comment_counts = Counter(index for index, _, _ in comments)
+        ratio = self.image_ratio
+        last_id = self.last_id(Post)
+        with explicit_dates(
+            Post._meta.get_field('pub_date'),
+            Post._meta.get_field('updated')
+        ):
+            self.bulk_create(Post, [
+                Post(
+                    author_id=author,
+                    group_id=group_ids.get(group),
+                    pub_date=pub_date,
+                    updated=pub_date,
+                    text=text,
+                    image=(
+                        self.random.choice(images)
+                        if images and self.random.random() < ratio else ''
+                    ),
+                    comment_count=comment_counts[index]
+                )
+                for index, (author, group, pub_date, text)
+                in enumerate(posts)
+            ])
+        return list(
+            Post.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def create_comments(self, comments, post_ids):
+        with explicit_dates(Comment._meta.get_field('created')):
+            self.bulk_create(Comment, [
+                Comment(
+                    post_id=post_ids[index],
+                    author_id=author,
+                    text=' '.join(self.random.choices(WORDS, k=8)),
+                    created=created
+                )
+                for index, author, created in comments
+            ])
+
+    def create_follows(self, follows):
+        last_id = self.last_id(Follow)
+        self.bulk_create(Follow, [
+            Follow(user_id=user, author_id=author)
+            for user, author in follows
+        ])
+        return last_id + 1, self.last_id(Follow)
+
+    def create_stats(self, user_ids, posts, follows):
+        post_counts = Counter(author for author, _, _, _ in posts)
+        followers = Counter(author for _, author in follows)
+        following = Counter(user for user, _ in follows)
+        self.bulk_create(UserStats, [
+            UserStats(
+                user_id=user_id,
+                post_count=post_counts[user_id],
+                follower_count=followers[user_id],
+                following_count=following[user_id]
+            )
+            for user_id in user_ids
+        ])
+
+    def fill_timelines(self, first_id, last_id):
+        for start in range(first_id, last_id + 1, self.chunk_size):
+            with transaction.atomic():
+                timeline.backfill_range(
+                    start, min(start + self.chunk_size - 1, last_id)
+                )
+
+    def last_id(self, model):
+        return model.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
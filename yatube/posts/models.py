@@ -1,9 +1,25 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .search import to_match_query
+
 User = get_user_model()
 
 
+class FullTextField(models.TextField):
+    """Колонка FTS5-таблицы, поддерживает lookup `match`."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
 class Group(models.Model):
     title = models.CharField(
         max_length=200,
@@ -19,17 +35,56 @@ class Group(models.Model):
         verbose_name='Описание',
         help_text='Описание группы'
     )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов',
+        help_text='Счётчик постов в группе'
+    )
 
     def __str__(self) -> str:
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа одним запросом, без лишних полей."""
+        return self.select_related('author', 'group').only(
+            'id',
+            'text',
+            'pub_date',
+            'image',
+            'author_id',
+            'group_id',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__title',
+            'group__slug',
+        )
+
+    def search(self, text):
+        """Посты с текстом по запросу, релевантность в search_rank.
+
+        Меньшее значение search_rank (bm25) — более подходящий пост.
+        Запрос без слов ничего не находит: пустой MATCH — ошибка FTS5.
+        """
+        query = to_match_query(text)
+        if not query:
+            return self.none()
+        return self.filter(
+            search_index__text__match=query
+        ).annotate(search_rank=models.F('search_index__rank'))
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста'
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    # Время последнего изменения; служит валидатором страницы поста.
+    updated = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -52,16 +107,54 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+        help_text='Счётчик комментариев к посту'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Ленты идут по (pub_date, id) в обе стороны: id в индексе SQLite
+        # есть неявно, и возрастающий индекс читается с конца без сортировки.
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
 
 
+class PostSearchIndex(models.Model):
+    """FTS5-индекс текстов постов, таблицу ведёт SQLite."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index'
+    )
+    text = FullTextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -87,6 +180,14 @@ class Comment(models.Model):
         help_text='Дата добавления комментария'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -111,3 +212,81 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+        # Уникальный индекс начинается с user; подписчиков автора ищем
+        # по отдельному индексу.
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+        help_text='Пользователь, к которому относятся счётчики'
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+        help_text='Счётчик постов пользователя'
+    )
+    follower_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков',
+        help_text='Счётчик подписчиков пользователя'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок',
+        help_text='Счётчик авторов, на которых подписан пользователь'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+        help_text='Владелец ленты подписок'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+        help_text='Пост в ленте подписок'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        help_text='Копия даты публикации поста для сортировки ленты'
+    )
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+        # Лента идёт по (pub_date, post) внутри пользователя; post в индексе
+        # делает его покрывающим для выборки ключей страницы.
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='timeline_user_date_post_idx'
+            )
+        ]
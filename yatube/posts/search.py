@@ -0,0 +1,16 @@
+"""Полнотекстовый поиск по постам через SQLite FTS5.
+
+Индекс posts_post_fts — внешняя FTS5-таблица над posts_post, её
+синхронизируют триггеры из миграции. Запрос пользователя не передаётся
+в MATCH как есть: из него берутся слова, каждое ищется как префикс, все
+слова должны встретиться в тексте.
+"""
+import re
+
+MAX_TERMS = 8
+
+
+def to_match_query(text):
+    """Выражение FTS5 для строки поиска или '', если слов в ней нет."""
+    terms = re.findall(r'\w+', text.lower())[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_init, post_save
+)
+from django.dispatch import receiver
+
+from core import caching, replicas
+from . import counters, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def bump_pages(user_ids=(), group_ids=(), listing=False):
+    """Сбрасывает кеш страниц профилей, групп и, при listing, главной."""
+    scopes = ['posts'] if listing else []
+    scopes += [
+        f'author:{username}'
+        for username in User.objects.filter(
+            pk__in=user_ids
+        ).values_list('username', flat=True)
+    ]
+    scopes += [
+        f'group:{slug}'
+        for slug in Group.objects.filter(
+            pk__in=[group_id for group_id in group_ids if group_id]
+        ).values_list('slug', flat=True)
+    ]
+    caching.bump(*scopes)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def feed_changed(sender, using, **kwargs):
+    # Реплики без этого изменения больше не годятся для лент.
+    replicas.mark_written(using)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+    image = instance.__dict__.get('image')
+    instance._loaded_image = getattr(image, 'name', image)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.post_created(instance)
+        timeline.fan_out(instance)
+    elif instance._loaded_group_id != instance.group_id:
+        counters.post_moved(instance._loaded_group_id, instance.group_id)
+    image = instance.image.name
+    if image and image != instance._loaded_image:
+        transaction.on_commit(lambda: thumbnails.schedule(image))
+    bump_pages(
+        [instance.author_id],
+        [instance._loaded_group_id, instance.group_id],
+        listing=True
+    )
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = image
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.post_deleted(instance)
+    bump_pages([instance.author_id], [instance.group_id], listing=True)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    caching.bump('groups')
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.comment_created(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.comment_deleted(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.follow_created(instance)
+        timeline.backfill(instance.user_id, instance.author_id)
+        bump_pages([instance.user_id, instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.follow_deleted(instance)
+    timeline.remove(instance.user_id, instance.author_id)
+    timeline.resume_fan_out(instance.author_id)
+    bump_pages([instance.user_id, instance.author_id])
@@ -0,0 +1,17 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post):
+    """Готовая миниатюра картинки поста или None, ничего не генерирует.
+
+    Если миниатюры страницы уже найдены через thumbnails.prefetch,
+    повторного обращения к хранилищу нет.
+    """
+    if hasattr(post, 'thumbnail'):
+        return post.thumbnail
+    return thumbnails.cached_thumbnail(post.image)
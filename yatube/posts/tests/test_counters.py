@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовое название',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        self.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание'
+        )
+        self.post = Post.objects.create(
+            text='Тестовое содержимое поста',
+            author=self.author,
+            group=self.group
+        )
+
+    def assertCounters(self, obj, **expected):
+        obj.refresh_from_db()
+        for field, value in expected.items():
+            with self.subTest(obj=obj, field=field):
+                self.assertEqual(getattr(obj, field), value)
+
+    def test_post_counters(self):
+        """Проверка счётчиков постов автора и группы."""
+        self.assertCounters(self.author.stats, post_count=1)
+        self.assertCounters(self.group, post_count=1)
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertCounters(self.group, post_count=0)
+        self.assertCounters(self.other_group, post_count=1)
+        self.post.delete()
+        self.assertCounters(self.author.stats, post_count=0)
+        self.assertCounters(self.other_group, post_count=0)
+
+    def test_comment_counter(self):
+        """Проверка счётчика комментариев поста."""
+        comment = Comment.objects.create(
+            post=self.post,
+            author=self.reader,
+            text='Текст комментария'
+        )
+        self.assertCounters(self.post, comment_count=1)
+        comment.delete()
+        self.assertCounters(self.post, comment_count=0)
+
+    def test_follow_counters(self):
+        """Проверка счётчиков подписчиков и подписок."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertCounters(self.author.stats, follower_count=1)
+        self.assertCounters(self.reader.stats, following_count=1)
+        follow.delete()
+        self.assertCounters(self.author.stats, follower_count=0)
+        self.assertCounters(self.reader.stats, following_count=0)
+
+    def test_repair_counters_fixes_drift(self):
+        """Проверка, что команда чинит счётчики после bulk_create."""
+        Post.objects.bulk_create([
+            Post(text='Пост без сигналов', author=self.author,
+                 group=self.group)
+            for _ in range(3)
+        ])
+        UserStats.objects.filter(user=self.reader).delete()
+        call_command('repair_counters', chunk_size=1, stdout=StringIO())
+        self.assertCounters(self.author.stats, post_count=4)
+        self.assertCounters(self.group, post_count=4)
+        self.assertTrue(UserStats.objects.filter(user=self.reader).exists())
@@ -1,5 +1,8 @@
 import shutil
 import tempfile
+from io import BytesIO
+
+from PIL import Image
 
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -12,6 +15,13 @@ from posts.models import Group, Post, User
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+def make_jpeg(size, exif=None):
+    output = BytesIO()
+    options = {'exif': exif} if exif else {}
+    Image.new('RGB', size, 'red').save(output, 'JPEG', **options)
+    return output.getvalue()
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class FormsTests(TestCase):
     @classmethod
@@ -132,3 +142,51 @@ class FormsTests(TestCase):
         self.assertEqual(
             Post.objects.get(pk=self.post_id).comments.count(), 1
         )
+
+    def create_post_with(self, name, content):
+        self.form['image'] = SimpleUploadedFile(name, content, 'image/jpeg')
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data=self.form
+        )
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_image_is_normalized(self):
+        """Проверка уменьшения, удаления EXIF и progressive JPEG."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        self.create_post_with('photo.jpeg', make_jpeg((400, 200), exif))
+        post = Post.objects.latest('id')
+        self.assertEqual(post.image.name, 'posts/photo.jpg')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertTrue(image.info.get('progressive'))
+            self.assertNotIn('exif', image.info)
+
+    def test_oversized_upload_is_rejected(self):
+        """Проверка, что слишком большие файлы не принимаются."""
+        post_count = Post.objects.count()
+        cases = {
+            'IMAGE_UPLOAD_MAX_SIZE': 100,
+            'IMAGE_UPLOAD_MAX_PIXELS': 100,
+        }
+        for setting, value in cases.items():
+            with self.subTest(setting=setting):
+                with override_settings(**{setting: value}):
+                    response = self.create_post_with(
+                        'big.jpg', make_jpeg((20, 20))
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context['form'].errors['image'])
+        self.assertEqual(Post.objects.count(), post_count)
+
+    def test_truncated_image_is_rejected(self):
+        """Проверка, что обрезанный JPEG даёт ошибку формы, а не 500."""
+        post_count = Post.objects.count()
+        content = make_jpeg((400, 200))
+        response = self.create_post_with(
+            'broken.jpg', content[:len(content) // 2]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertEqual(Post.objects.count(), post_count)
@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase
+
+from core.pagination import CursorPaginator
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class IndexUsageTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.group = Group.objects.create(
+            title='Тестовое название',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        self.post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group
+        )
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def page_query(self, posts, after=None):
+        paginator = CursorPaginator(posts, 10)
+        queryset = posts.order_by(*paginator.ordering())
+        if after is not None:
+            queryset = queryset.filter(
+                paginator.beyond(after.pub_date, after.pk)
+            )
+        return queryset[:11]
+
+    def test_feeds_read_index_range(self):
+        """Проверка, что ленты читают индекс без сортировки."""
+        feeds = {
+            'post_pub_date_idx': Post.objects.for_feed(),
+            'post_group_pub_date_idx': self.group.posts.for_feed(),
+            'post_author_pub_date_idx': self.author.posts.for_feed(),
+        }
+        for index, posts in feeds.items():
+            for after in (None, self.post):
+                with self.subTest(index=index, cursor=after is not None):
+                    plan = self.plan(self.page_query(posts, after))
+                    self.assertIn(index, plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_lookups_use_composite_indexes(self):
+        """Проверка индексов комментариев поста и подписчиков автора."""
+        queries = {
+            'comment_post_created_idx': Comment.objects.filter(
+                post=self.post
+            ).order_by('created'),
+            'follow_author_user_idx': Follow.objects.filter(
+                author=self.author
+            ).values('user'),
+        }
+        for index, queryset in queries.items():
+            with self.subTest(index=index):
+                plan = self.plan(queryset)
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_comment_pages_read_index_range(self):
+        """Проверка, что порции комментариев читают индекс без сортировки."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        comments = Comment.objects.filter(post=self.post).select_related(
+            'author'
+        )
+        paginator = CursorPaginator(comments, 20, 'created')
+        for after in (None, comment):
+            with self.subTest(cursor=after is not None):
+                queryset = comments.order_by(*paginator.ordering())
+                if after is not None:
+                    queryset = queryset.filter(
+                        paginator.beyond(after.created, after.pk)
+                    )
+                plan = self.plan(queryset[:21])
+                self.assertIn('comment_post_created_idx', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_feed_reads_index_range(self):
+        """Проверка, что ключи ленты подписок читаются из индекса."""
+        follower = User.objects.create(username='follower')
+        Follow.objects.create(user=follower, author=self.author)
+        entry = TimelineEntry.objects.get(user=follower)
+        entries = TimelineEntry.objects.filter(user=follower).only(
+            'post', 'pub_date'
+        )
+        paginator = CursorPaginator(entries, 10, key_field='post_id')
+        for after in (None, entry):
+            with self.subTest(cursor=after is not None):
+                queryset = entries.order_by(*paginator.ordering())
+                if after is not None:
+                    queryset = queryset.filter(
+                        paginator.beyond(after.pub_date, after.post_id)
+                    )
+                plan = self.plan(queryset[:11])
+                self.assertIn('timeline_user_date_post_idx', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,120 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import urls
+from posts.models import Comment, Follow, Group, Post, User
+
+POSTS_COUNT = 15
+
+# Сессия, пользователь и валидаторы.
+REVALIDATION_BUDGET = 3
+
+# Максимальное число SQL-запросов на каждый маршрут posts.urls.
+# Бюджет не должен зависеть от количества постов на странице; миниатюры
+# всех карточек страницы ищутся одним запросом. Ленты и страница поста
+# тратят ещё один запрос на валидаторы условного GET.
+QUERY_BUDGETS = {
+    'index': 5,
+    'group_list': 6,
+    'profile': 6,
+    'post_edit': 5,
+    'post_detail': 6,
+    'comments': 4,
+    'search': 4,
+    'post_create': 3,
+    'add_comment': 5,
+    'follow_index': 7,
+    'profile_follow': 4,
+    'profile_unfollow': 11,
+}
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(
+            title='Тестовое название',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        self.author = User.objects.create(username='author')
+        self.user = User.objects.create(username='TestUser')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Follow.objects.create(user=self.user, author=self.author)
+        for number in range(POSTS_COUNT):
+            author = self.user if number % 2 else self.author
+            post = Post.objects.create(
+                text=f'Тестовый пост {number}',
+                author=author,
+                group=self.group,
+                image=f'posts/{number}.gif'
+            )
+            Comment.objects.create(
+                post=post,
+                author=self.author,
+                text='Текст комментария'
+            )
+        self.post = Post.objects.filter(author=self.user).first()
+        cache.clear()
+
+    def route_requests(self):
+        post_id = {'post_id': self.post.id}
+        return {
+            'index': ('get', {}, None),
+            'group_list': ('get', {'slug': 'test-slug'}, None),
+            'profile': ('get', {'username': 'author'}, None),
+            'post_edit': ('get', post_id, None),
+            'post_detail': ('get', post_id, None),
+            'comments': ('get', post_id, None),
+            'search': ('get', {}, {'q': 'пост'}),
+            'post_create': ('get', {}, None),
+            'add_comment': ('post', post_id, {'text': 'Комментарий'}),
+            'follow_index': ('get', {}, None),
+            'profile_follow': ('get', {'username': 'author'}, None),
+            'profile_unfollow': ('get', {'username': 'author'}, None),
+        }
+
+    def test_every_route_has_budget(self):
+        """Проверка, что у каждого маршрута posts.urls есть бюджет."""
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+        self.assertEqual(names, set(self.route_requests()))
+
+    def test_routes_stay_within_query_budget(self):
+        """Проверка, что страницы не превышают бюджет SQL-запросов."""
+        for name, (method, kwargs, data) in self.route_requests().items():
+            with self.subTest(route=name):
+                cache.clear()
+                url = reverse(f'posts:{name}', kwargs=kwargs)
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(self.authorized_client, method)(
+                        url, data
+                    )
+                self.assertLess(response.status_code, 400)
+                self.assertLessEqual(
+                    len(queries),
+                    QUERY_BUDGETS[name],
+                    '\n'.join(query['sql'] for query in queries)
+                )
+
+    def test_revalidation_skips_rendering(self):
+        """Проверка ответа 304 без рендеринга на повторный запрос."""
+        routes = self.route_requests()
+        for name in (
+            'index', 'group_list', 'profile', 'post_detail', 'comments',
+            'search', 'follow_index'
+        ):
+            method, kwargs, data = routes[name]
+            with self.subTest(route=name):
+                url = reverse(f'posts:{name}', kwargs=kwargs)
+                etag = self.authorized_client.get(url, data)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(
+                        url, data, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.templates)
+                self.assertLessEqual(len(queries), REVALIDATION_BUDGET)
@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.views import POSTS_PER_PAGE
+
+POSTS_COUNT = 15
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.guest_client = Client()
+        for number in range(POSTS_COUNT):
+            Post.objects.create(
+                text=f'Пост номер {number} про котов',
+                author=self.author
+            )
+        self.other = Post.objects.create(
+            text='Совсем другая запись',
+            author=self.author
+        )
+        cache.clear()
+
+    def search(self, query, **params):
+        return self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+
+    def test_search_finds_posts_by_prefix(self):
+        """Проверка поиска по началу слова без учёта регистра."""
+        response = self.search('ЗАП')
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+
+    def test_search_walks_all_results_by_cursor(self):
+        """Проверка, что курсоры проходят по всем найденным постам."""
+        seen = []
+        response = self.search('коты котов')
+        self.assertEqual(list(response.context['page_obj']), [])
+        response = self.search('кот')
+        while True:
+            page_obj = response.context['page_obj']
+            self.assertLessEqual(len(page_obj), POSTS_PER_PAGE)
+            seen += list(page_obj)
+            if not page_obj.next_cursor:
+                break
+            self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&amp;cursor=')
+            response = self.search('кот', cursor=page_obj.next_cursor)
+        self.assertEqual(len(seen), POSTS_COUNT)
+        self.assertEqual(len(set(seen)), POSTS_COUNT)
+        ranks = [post.search_rank for post in seen]
+        self.assertEqual(ranks, sorted(ranks))
+
+    def test_index_follows_post_changes(self):
+        """Проверка, что индекс следует за изменением и удалением постов."""
+        Post.objects.filter(pk=self.other.pk).update(text='Новый текст')
+        self.assertFalse(Post.objects.search('другая').exists())
+        self.assertTrue(Post.objects.search('новый').exists())
+        self.other.delete()
+        self.assertFalse(Post.objects.search('новый').exists())
+
+    def test_empty_query_shows_form_only(self):
+        """Проверка, что пустой запрос не ищет ничего."""
+        response = self.search(' !? ')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_admin_search_uses_index(self):
+        """Проверка поиска в админке через полнотекстовый индекс."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'запись'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.other]
+        )
+
+    def test_punctuation_query_finds_nothing(self):
+        """Проверка, что запрос без слов не ломает поиск и админку."""
+        self.assertFalse(Post.objects.search('"!?').exists())
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        for query in ('!?', '"'):
+            with self.subTest(query=query):
+                response = client.get(
+                    reverse('admin:posts_post_changelist'), {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,83 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedCommandTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        call_command('seed', stdout=StringIO(), seed=1, chunk_size=50, **{
+            'users': 30,
+            'groups': 3,
+            'posts': 300,
+            'comments': 200,
+            'follows': 60,
+            **options,
+        })
+
+    def test_seed_creates_requested_volumes(self):
+        """Проверка количества созданных объектов и картинок."""
+        self.seed(images=2, image_ratio=0.5)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertEqual(Follow.objects.count(), 60)
+        images = set(
+            Post.objects.exclude(image='').values_list('image', flat=True)
+        )
+        self.assertEqual(len(images), 2)
+        dates = Post.objects.values_list('pub_date', flat=True)
+        self.assertGreater(max(dates) - min(dates), timedelta(days=1))
+        self.assertFalse(
+            Comment.objects.filter(created__lt=F('post__pub_date')).exists()
+        )
+        self.assertFalse(
+            Comment.objects.filter(created__gt=timezone.now()).exists()
+        )
+
+    def test_seed_keeps_counters_and_timelines_consistent(self):
+        """Проверка, что счётчики и ленты совпадают с данными."""
+        self.seed()
+        self.seed()
+        output = StringIO()
+        call_command('repair_counters', dry_run=True, stdout=output)
+        self.assertEqual(output.getvalue().count('расхождений 0'), 3)
+        for follow in Follow.objects.all():
+            expected = min(
+                Post.objects.filter(author=follow.author_id).count(),
+                timeline.BACKFILL_POSTS
+            )
+            self.assertEqual(
+                TimelineEntry.objects.filter(
+                    user=follow.user_id,
+                    post__author=follow.author_id
+                ).count(),
+                expected
+            )
+
+    def test_authors_are_skewed(self):
+        """Проверка, что у популярных авторов заметно больше постов."""
+        self.seed()
+        counts = sorted(
+            User.objects.values_list('stats__post_count', flat=True),
+            reverse=True
+        )
+        self.assertGreater(counts[0], 5 * counts[len(counts) // 2])
@@ -0,0 +1,152 @@
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        # TestCase не фиксирует транзакции, поэтому колбэки on_commit
+        # выполняются сразу.
+        on_commit = mock.patch(
+            'posts.signals.transaction.on_commit',
+            side_effect=lambda callback: callback()
+        )
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+
+    def create_post(self, name='small.gif'):
+        return Post.objects.create(
+            text='Пост с картинкой',
+            author=self.author,
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif')
+        )
+
+    def test_worker_errors_are_logged(self):
+        """Проверка, что ошибка пула логируется, а сломанный пул заменяется."""
+        self.addCleanup(setattr, thumbnails, '_executor', None)
+        for error in (OSError('нет файла'), BrokenProcessPool('упал')):
+            with self.subTest(error=error):
+                executor = ThreadPoolExecutor(max_workers=1)
+                thumbnails._executor = executor
+                with mock.patch.object(
+                    thumbnails.thumbnail_worker, 'generate',
+                    side_effect=error
+                ):
+                    with self.assertLogs('posts.thumbnails', 'ERROR') as logs:
+                        thumbnails.submit('posts/small.gif')
+                        # Колбэки выполняются в потоке пула.
+                        executor.shutdown(wait=True)
+                self.assertIn('posts/small.gif', logs.output[0])
+                self.assertEqual(
+                    thumbnails._executor is executor,
+                    not isinstance(error, BrokenProcessPool)
+                )
+
+    def test_new_image_is_generated_on_save(self):
+        """Проверка, что все варианты готовятся при сохранении поста."""
+        post = self.create_post()
+        thumbnail = thumbnails.cached_thumbnail(post.image)
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual(set(thumbnail.variants), set(thumbnails.FORMATS))
+        for variants in thumbnail.variants.values():
+            self.assertEqual(
+                tuple(image.width for image in variants),
+                thumbnails.WIDTHS
+            )
+        geometry = thumbnails.VARIANTS[len(thumbnails.WIDTHS) - 1][0]
+        expected = get_thumbnail(
+            post.image, geometry, format='JPEG', **thumbnails.OPTIONS
+        )
+        self.assertEqual(thumbnail.src.name, expected.name)
+
+    def test_card_has_responsive_markup(self):
+        """Проверка srcset, размеров и ленивой загрузки в карточке."""
+        post = self.create_post()
+        response = Client().get(reverse('posts:index'))
+        thumbnail = response.context['page_obj'][0].thumbnail
+        self.assertEqual(response.context['page_obj'][0], post)
+        self.assertContains(response, f'srcset="{thumbnail.jpeg_srcset}"')
+        self.assertContains(response, f'sizes="{thumbnails.SIZES}"')
+        self.assertContains(
+            response,
+            f'width="{thumbnail.src.width}" height="{thumbnail.src.height}"'
+        )
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_unchanged_image_is_not_regenerated(self):
+        """Проверка, что правка текста не запускает генерацию."""
+        post = self.create_post()
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            post.text = 'Новый текст'
+            post.save()
+            schedule.assert_not_called()
+            post.image = SimpleUploadedFile('other.gif', SMALL_GIF)
+            post.save()
+            schedule.assert_called_once_with(post.image.name)
+
+    def test_rendering_never_generates(self):
+        """Проверка, что без готовой миниатюры показывается оригинал."""
+        with mock.patch.object(thumbnails, 'schedule'):
+            post = self.create_post()
+        with mock.patch.object(thumbnails, 'get_thumbnail') as generate:
+            response = Client().get(
+                reverse('posts:post_detail', kwargs={'post_id': post.id})
+            )
+            generate.assert_not_called()
+        self.assertContains(response, f'src="{post.image.url}"')
+
+    def test_prefetch_uses_single_query(self):
+        """Проверка, что миниатюры страницы ищутся одним запросом."""
+        ready = self.create_post()
+        with mock.patch.object(thumbnails, 'schedule'):
+            pending = self.create_post('pending.gif')
+        posts = [
+            Post.objects.get(pk=pk)
+            for pk in (ready.pk, pending.pk, ready.pk)
+        ]
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.prefetch(posts)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            posts[0].thumbnail.jpeg_srcset,
+            thumbnails.cached_thumbnail(ready.image).jpeg_srcset
+        )
+        self.assertIsNone(posts[1].thumbnail)
+        self.assertEqual(posts[2].thumbnail.src, posts[0].thumbnail.src)
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.prefetch(posts)
+        self.assertEqual(len(queries), 0)
@@ -0,0 +1,125 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User, UserStats
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.follower = User.objects.create(username='follower')
+        self.authorized_follower = Client()
+        self.authorized_follower.force_login(self.follower)
+        self.old_post = Post.objects.create(
+            text='Пост до подписки',
+            author=self.author
+        )
+        cache.clear()
+
+    def follow(self):
+        self.authorized_follower.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+
+    def test_follow_backfills_timeline(self):
+        """Проверка, что подписка переносит в ленту старые посты автора."""
+        self.follow()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower,
+            post=self.old_post
+        ).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        """Проверка, что новый пост попадает в ленту подписчика."""
+        self.follow()
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        entry = TimelineEntry.objects.get(user=self.follower, post=post)
+        self.assertEqual(entry.pub_date, post.pub_date)
+
+    def test_unfollow_clears_timeline(self):
+        """Проверка, что отписка убирает посты автора из ленты."""
+        self.follow()
+        self.authorized_follower.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.follower).exists()
+        )
+
+    def test_large_author_is_read_on_demand(self):
+        """Проверка, что посты популярного автора читаются без fan-out."""
+        with mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 0):
+            Follow.objects.create(user=self.follower, author=self.author)
+            post = Post.objects.create(text='Новый пост', author=self.author)
+            self.assertFalse(TimelineEntry.objects.exists())
+            response = self.authorized_follower.get(
+                reverse('posts:follow_index')
+            )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [post, self.old_post]
+        )
+
+    def test_author_back_under_limit_backfills(self):
+        """Проверка, что посты времени чтения напрямую не пропадают."""
+        other = User.objects.create(username='other')
+        with mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 1):
+            Follow.objects.create(user=self.follower, author=self.author)
+            follow = Follow.objects.create(user=other, author=self.author)
+            post = Post.objects.create(text='Новый пост', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            follow.delete()
+            response = self.authorized_follower.get(
+                reverse('posts:follow_index')
+            )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower,
+            post=post
+        ).exists())
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [post, self.old_post]
+        )
+
+    def test_repaired_counter_under_limit_backfills(self):
+        """Проверка дозаполнения, когда repair_counters снижает счётчик."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        UserStats.objects.filter(user=self.author).update(follower_count=5)
+        with mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 2):
+            post = Post.objects.create(text='Новый пост', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            call_command('repair_counters', stdout=StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower,
+            post=post
+        ).exists())
+
+    def test_pages_merge_timeline_and_large_authors(self):
+        """Проверка курсоров ленты из разложенных и читаемых постов."""
+        star = User.objects.create(username='star')
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.create(user=self.follower, author=star)
+        with mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 0):
+            for number in range(3):
+                Post.objects.create(text=f'Звезда {number}', author=star)
+                Post.objects.create(text=f'Автор {number}', author=self.author)
+            expected = list(Post.objects.filter(
+                author__in=[self.author, star]
+            ).order_by('-pub_date', '-id'))
+            seen = []
+            page = timeline.feed_page(self.follower, 3)
+            seen += page
+            while page.next_cursor:
+                page = timeline.feed_page(self.follower, 3, page.next_cursor)
+                seen += page
+            previous = timeline.feed_page(
+                self.follower, 3, page.previous_cursor
+            )
+        self.assertEqual(seen, expected)
+        self.assertEqual(list(previous), expected[3:6])
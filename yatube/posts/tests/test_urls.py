@@ -96,3 +96,14 @@ class StaticURLTests(TestCase):
             with self.subTest(url=url):
                 response = self.guest_client.get(url, follow=True)
                 self.assertRedirects(response, redirect_url)
+
+    def test_missing_post_pages_not_found(self):
+        """Проверка ответа 404 для страниц несуществующего поста."""
+        for name in ('posts:post_detail', 'posts:comments'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(
+                    reverse(name, kwargs={'post_id': self.post_id + 100})
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_FOUND.value
+                )
@@ -1,13 +1,18 @@
+import base64
+import gzip
 import shutil
 import tempfile
+import zlib
 
 from django.core.cache import cache
-from django.test import Client, TestCase, override_settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django import forms
 
+from core import caching
 from posts.models import Group, Post, User, Comment, Follow
 from posts.forms import PostForm
 
@@ -213,7 +218,7 @@ class ViewsAndContextTests(TestCase):
             follow=True
         )
         self.assertEqual(
-            response.context.get('comments').latest('id'),
+            response.context.get('comments')[0],
             Comment.objects.all().latest('id')
         )
 
@@ -222,14 +227,33 @@ class ViewsAndContextTests(TestCase):
         cache.clear()
         response = self.authorized_user.get(reverse('posts:index'))
         new_cache = response.content
-        post = Post.objects.get(pk=1)
-        post.delete()
+        Post.objects.filter(pk=self.post_id).update(text='Текст мимо кеша')
         response = self.authorized_user.get(reverse('posts:index'))
         self.assertEqual(response.content, new_cache)
         cache.clear()
         response = self.authorized_user.get(reverse('posts:index'))
         self.assertNotEqual(response.content, new_cache)
 
+    def test_cache_invalidated_on_write(self):
+        """Проверка, что запись поста сбрасывает кеш зависимых страниц."""
+        pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'TestUser'}),
+        ]
+        for page in pages:
+            with self.subTest(page=page):
+                cached = self.authorized_user.get(page).content
+                post = Post.objects.get(pk=self.post_id)
+                post.text = f'Отредактированный пост для {page}'
+                post.save()
+                response = self.authorized_user.get(page)
+                self.assertNotEqual(response.content, cached)
+                self.assertContains(response, post.text)
+        Post.objects.get(pk=self.post_id).delete()
+        response = self.authorized_user.get(reverse('posts:index'))
+        self.assertNotContains(response, post.text)
+
     def test_add_follow(self):
         """Проверка возможности подписки авториз. юзером."""
         self.assertEqual(Follow.objects.all().count(), 0)
@@ -320,8 +344,222 @@ class PaginatorViewsTests(TestCase):
                 response = self.authorized_client.get(
                     reverse(reverse_name, kwargs=kwargs)
                 )
-                self.assertEqual(len(response.context['page_obj']), 10)
+                first_page = response.context['page_obj']
+                self.assertEqual(len(first_page), 10)
+                self.assertIsNone(first_page.previous_cursor)
                 response = self.authorized_client.get(
-                    reverse(reverse_name, kwargs=kwargs), {'page': 2}
+                    reverse(reverse_name, kwargs=kwargs),
+                    {'cursor': first_page.next_cursor}
+                )
+                second_page = response.context['page_obj']
+                self.assertEqual(len(second_page), 3)
+                self.assertIsNone(second_page.next_cursor)
+                response = self.authorized_client.get(
+                    reverse(reverse_name, kwargs=kwargs),
+                    {'cursor': second_page.previous_cursor}
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    list(first_page)
+                )
+
+    def test_paginator_ignores_broken_cursor(self):
+        """Проверка, что испорченный курсор открывает первую страницу."""
+        huge = base64.urlsafe_b64encode(
+            f'n|2026-01-01T00:00:00+00:00|{2 ** 64}'.encode()
+        ).decode()
+        for cursor in ('не-курсор', huge):
+            with self.subTest(cursor=cursor):
+                response = self.authorized_client.get(
+                    reverse('posts:index'), {'cursor': cursor}
+                )
+                self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_comments_paginator_and_fragment(self):
+        """Проверка порций комментариев на странице поста и во фрагменте."""
+        Comment.objects.bulk_create([
+            Comment(post_id=1, author=self.user, text=f'Комментарий {i}')
+            for i in range(25)
+        ])
+        newest_first = list(
+            Comment.objects.filter(post_id=1).order_by('-created', '-id')
+        )
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 1})
+        )
+        first_page = response.context['comments']
+        self.assertEqual(list(first_page), newest_first[:20])
+        self.assertContains(response, 'Показать ещё комментарии')
+        response = self.guest_client.get(
+            reverse('posts:comments', kwargs={'post_id': 1}),
+            {'cursor': first_page.next_cursor}
+        )
+        second_page = response.context['comments']
+        self.assertEqual(list(second_page), newest_first[20:])
+        self.assertIsNone(second_page.next_cursor)
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertNotContains(response, '<html')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='TestUser')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(text='Пост', author=self.user)
+
+    def test_post_edit_changes_validators(self):
+        """Проверка, что правка поста меняет ETag и Last-Modified."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        response = self.client.get(url)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            {'text': 'Исправленный пост'}
+        )
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, self.post.pub_date)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertEqual(
+            response['Last-Modified'],
+            self.post.updated.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        )
+
+    def test_new_post_changes_feed_etag(self):
+        """Проверка, что новый пост меняет ETag главной и профиля."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'TestUser'}),
+        )
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Post.objects.create(text='Новый пост', author=self.user)
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Новый пост')
+
+
+class StreamingFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='TestUser')
+        self.group = Group.objects.create(
+            title='Группа',
+            slug='test-slug',
+            description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Поток {i}', author=self.user, group=self.group)
+            for i in range(3)
+        )
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'TestUser'}),
+            reverse('posts:search') + '?q=Поток',
+        )
+
+    @staticmethod
+    def normalize(html):
+        return ' '.join(html.split())
+
+    def test_feeds_stream_same_page(self):
+        """Проверка, что сжатый поток совпадает с обычной страницей."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                plain = self.client.get(url).content.decode()
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertIn('Accept-Encoding', response['Vary'])
+                streamed = gzip.decompress(
+                    b''.join(response.streaming_content)
+                ).decode()
+                self.assertEqual(
+                    self.normalize(streamed), self.normalize(plain)
+                )
+
+    def test_gzip_refused_with_zero_quality(self):
+        """Проверка, что gzip;q=0 — отказ от сжатия, а не согласие."""
+        url = reverse('posts:index')
+        for header, streamed in (
+            ('gzip;q=0', False),
+            ('gzip; q=0.0, identity', False),
+            ('*;q=0', False),
+            ('br, gzip;q=0.5', True),
+            ('*', True),
+        ):
+            with self.subTest(header=header):
+                cache.clear()
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.streaming, streamed)
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_encodings_have_distinct_etags(self):
+        """Проверка, что у сжатой и обычной страницы разные ETag."""
+        url = reverse('posts:index')
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertNotEqual(plain['ETag'], compressed['ETag'])
+        response = self.client.get(
+            url,
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=compressed['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=compressed['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_head_sent_before_posts(self):
+        """Проверка, что первый кусок потока — шапка без постов."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = iter(response.streaming_content)
+        first = decompressor.decompress(next(chunks)).decode()
+        self.assertIn('<head>', first)
+        self.assertNotIn('Поток', first)
+        rest = b''.join(decompressor.decompress(chunk) for chunk in chunks)
+        self.assertIn('Поток 2', rest.decode())
+
+    def test_streamed_page_cached(self):
+        """Проверка, что отданный поток попадает в кеш страниц."""
+        url = reverse('posts:index')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        streamed = b''.join(response.streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, streamed)
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+
+    def test_lock_held_until_stream_stored(self):
+        """Проверка, что блокировку пересчёта снимает конец потока."""
+        request = RequestFactory().get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        request.user = AnonymousUser()
+        for consume in (True, False):
+            with self.subTest(consume=consume):
+                cache.clear()
+                key = caching.page_key(request, 'index', ['posts', 'groups'])
+                lock_key = caching.LOCK_KEY.format(key)
+                response = self.client.get(
+                    reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
                 )
-                self.assertEqual(len(response.context['page_obj']), 3)
+                self.assertTrue(response.streaming)
+                self.assertIsNotNone(cache.get(lock_key))
+                if consume:
+                    b''.join(response.streaming_content)
+                response.close()
+                self.assertIsNone(cache.get(lock_key))
+                self.assertEqual(cache.get(key) is not None, consume)
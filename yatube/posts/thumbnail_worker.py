@@ -0,0 +1,18 @@
+"""Точки входа процессов, генерирующих миниатюры.
+
+Модуль загружается в дочернем процессе до настройки Django, поэтому
+приложения импортируются только внутри функций.
+"""
+import os
+
+import django
+
+
+def setup(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def generate(name):
+    from posts import thumbnails
+    return thumbnails.generate(name)
@@ -0,0 +1,256 @@
+"""Миниатюры картинок постов.
+
+Миниатюры готовятся заранее: при сохранении поста с новой картинкой
+задача уходит в пул процессов, а шаблоны только ищут готовый результат
+в key-value хранилище sorl и, пока его нет, показывают исходную картинку.
+Так рендеринг никогда не ждёт декодирования и ресайза в Pillow.
+
+Для каждой картинки готовится несколько ширин (WIDTHS) в JPEG и WebP,
+чтобы браузер выбирал по srcset вариант под размер экрана.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.conf import settings
+from django.db import connection
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.models import KVStore
+
+from . import thumbnail_worker
+
+ASPECT_RATIO = 339 / 960
+WIDTHS = (320, 640, 960)
+# WebP есть не в каждой сборке Pillow; без него остаются только JPEG.
+FORMATS = ('JPEG', 'WEBP') if features.check('webp') else ('JPEG',)
+VARIANTS = [
+    (f'{width}x{round(width * ASPECT_RATIO)}', image_format)
+    for image_format in FORMATS
+    for width in WIDTHS
+]
+OPTIONS = {'crop': 'center', 'upscale': True}
+# Карточка занимает ширину контейнера, но не больше 960 пикселей.
+SIZES = '(min-width: 992px) 960px, 100vw'
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+class ThumbnailLookup(ThumbnailBackend):
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры с тем же именем, что даст get_thumbnail.
+
+        Опции дополняются так же, как в ThumbnailBackend.get_thumbnail,
+        но ни исходная картинка, ни хранилище файлов не читаются.
+        """
+        source = ImageFile(file_)
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+lookup = ThumbnailLookup()
+
+
+class ResponsiveImage:
+    """Готовые варианты одной картинки для <picture> и srcset."""
+
+    def __init__(self, variants):
+        # {формат: [ImageFile по возрастанию ширины]}
+        self.variants = variants
+        self.src = variants['JPEG'][-1]
+        self.sizes = SIZES
+
+    @property
+    def complete(self):
+        return sum(map(len, self.variants.values())) == len(VARIANTS)
+
+    def srcset(self, image_format):
+        return ', '.join(
+            f'{image.url} {image.width}w'
+            for image in self.variants.get(image_format, ())
+        )
+
+    @property
+    def jpeg_srcset(self):
+        return self.srcset('JPEG')
+
+    @property
+    def webp_srcset(self):
+        return self.srcset('WEBP')
+
+
+def load_values(keys):
+    """Сырые значения key-value хранилища sorl: кеш, затем база.
+
+    Один get_many к кешу и, для промахов, один запрос к базе.
+    """
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(list(keys))
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStore.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        # Как и sorl, запоминаем в кеше и отсутствие записи.
+        fetched = {key: found.get(key, EMPTY_VALUE) for key in missing}
+        kv_cache.set_many(fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+    return values
+
+
+def resolve(images):
+    """Готовые варианты для каждой картинки списка, без генерации.
+
+    Для картинки без единого готового JPEG возвращается None.
+    """
+    variant_keys = []
+    for image in images:
+        keys = []
+        if image:
+            for geometry, image_format in VARIANTS:
+                thumbnail = lookup.thumbnail_file(
+                    image, geometry, format=image_format, **OPTIONS
+                )
+                keys.append((image_format, add_prefix(thumbnail.key)))
+        variant_keys.append(keys)
+    values = load_values({key for keys in variant_keys for _, key in keys})
+    files = {
+        key: deserialize_image_file(value)
+        for key, value in values.items()
+        if value != EMPTY_VALUE
+    }
+    results = []
+    for keys in variant_keys:
+        variants = {}
+        for image_format, key in keys:
+            if key in files:
+                variants.setdefault(image_format, []).append(files[key])
+        if 'JPEG' in variants:
+            results.append(ResponsiveImage(variants))
+        else:
+            results.append(None)
+    return results
+
+
+def cached_thumbnail(image):
+    """Готовые варианты картинки или None, если их ещё не сгенерировали."""
+    if not image:
+        return None
+    return resolve([image])[0]
+
+
+def prefetch(posts):
+    """Находит готовые миниатюры сразу для всех постов страницы.
+
+    Вместо отдельного обращения к key-value хранилищу на каждый вариант
+    каждой картинки делается один get_many к кешу и, для промахов, один
+    запрос к базе. Результат кладётся в post.thumbnail.
+    """
+    posts = list(posts)
+    images = resolve([post.image for post in posts])
+    for post, image in zip(posts, images):
+        post.thumbnail = image
+
+
+def generate(name):
+    """Генерирует все варианты картинки; возвращает True при успехе."""
+    try:
+        thumbnails = [
+            get_thumbnail(name, geometry, format=image_format, **OPTIONS)
+            for geometry, image_format in VARIANTS
+        ]
+    except Exception:
+        logger.exception('Не удалось сгенерировать миниатюры %s', name)
+        return False
+    return all(
+        default.kvstore.get(thumbnail) is not None
+        for thumbnail in thumbnails
+    )
+
+
+def create_executor(workers):
+    """Пул процессов-генераторов.
+
+    Процессы запускаются через spawn: форк процесса с открытыми
+    соединениями к базе и кешу небезопасен.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=thumbnail_worker.setup,
+        initargs=(settings.SETTINGS_MODULE,)
+    )
+
+
+def get_executor():
+    """Общий пул процесса, создаётся при первой задаче."""
+    global _executor
+    if _executor is None:
+        _executor = create_executor(settings.THUMBNAIL_WORKERS)
+    return _executor
+
+
+def reset_executor(executor):
+    """Забывает сломанный пул; следующая задача создаст новый."""
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False)
+
+
+def task_done(name, executor, future):
+    """Логирует ошибку задачи; сломанный пул (упал процесс) заменяется."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is None:
+        return
+    logger.error(
+        'Не удалось сгенерировать миниатюры %s', name,
+        exc_info=(type(error), error, error.__traceback__)
+    )
+    if isinstance(error, BrokenProcessPool):
+        reset_executor(executor)
+
+
+def submit(name):
+    """Отправляет генерацию в пул процессов, заменяя сломанный пул."""
+    executor = get_executor()
+    try:
+        future = executor.submit(thumbnail_worker.generate, name)
+    except BrokenProcessPool:
+        reset_executor(executor)
+        executor = get_executor()
+        future = executor.submit(thumbnail_worker.generate, name)
+    future.add_done_callback(partial(task_done, name, executor))
+    return future
+
+
+def schedule(name):
+    """Ставит генерацию миниатюры в очередь пула процессов.
+
+    Без пула (THUMBNAIL_WORKERS = 0) или с базой в памяти, которую
+    дочерний процесс не увидит, миниатюра генерируется на месте.
+    """
+    in_memory = getattr(connection, 'is_in_memory_db', lambda: False)()
+    if not settings.THUMBNAIL_WORKERS or in_memory:
+        generate(name)
+        return
+    submit(name)
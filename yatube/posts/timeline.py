@@ -0,0 +1,185 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Новый пост раскладывается по лентам всех подписчиков автора. Для авторов
+с очень большим числом подписчиков запись не размножается: их посты
+подмешиваются в ленту при чтении (fan-out-on-read).
+"""
+from django.db import connection
+
+from core.pagination import CursorPaginator
+from .models import Follow, Post, TimelineEntry, UserStats
+
+FANOUT_FOLLOWERS_LIMIT = 10000
+BACKFILL_POSTS = 200
+BATCH_SIZE = 500
+
+
+def is_fanout_author(author_id):
+    """Раскладывать ли посты автора по лентам подписчиков при записи."""
+    return not UserStats.objects.filter(
+        user_id=author_id,
+        follower_count__gt=FANOUT_FOLLOWERS_LIMIT
+    ).exists()
+
+
+def pull_authors(user):
+    """Авторы из подписок пользователя, чьи посты читаются напрямую."""
+    return Follow.objects.filter(
+        user=user,
+        author__stats__follower_count__gt=FANOUT_FOLLOWERS_LIMIT
+    ).values_list('author_id', flat=True)
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту свежими постами автора после подписки."""
+    if not is_fanout_author(author_id):
+        return
+    recent_posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('id', 'pub_date')[:BACKFILL_POSTS]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in recent_posts
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill_range(first_follow_id, last_follow_id):
+    """Заполняет ленты для диапазона подписок одним запросом.
+
+    То же, что backfill для каждой подписки, но без выборки постов в
+    Python; нужно для массовой загрузки подписок через bulk_create.
+    """
+    sql = f"""
+        INSERT INTO {TimelineEntry._meta.db_table} (user_id, post_id, pub_date)
+        SELECT follow.user_id, post.id, post.pub_date
+        FROM {Follow._meta.db_table} follow
+        JOIN {Post._meta.db_table} post ON post.id IN (
+            SELECT recent.id FROM {Post._meta.db_table} recent
+            WHERE recent.author_id = follow.author_id
+            ORDER BY recent.pub_date DESC
+            LIMIT %s
+        )
+        WHERE follow.id BETWEEN %s AND %s
+        AND follow.author_id NOT IN (
+            SELECT user_id FROM {UserStats._meta.db_table}
+            WHERE follower_count > %s
+        )
+        ON CONFLICT DO NOTHING
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            BACKFILL_POSTS,
+            first_follow_id,
+            last_follow_id,
+            FANOUT_FOLLOWERS_LIMIT,
+        ])
+
+
+def resume_fan_out(author_id, decrease=1):
+    """Дозаполняет ленты, когда автор снова раскладывается при записи.
+
+    Пока подписчиков было больше FANOUT_FOLLOWERS_LIMIT, новые посты
+    автора в ленты не попадали; без дозаполнения они пропали бы из лент,
+    как только автор перестал читаться напрямую. Вызывается после того,
+    как сохранённое число подписчиков уменьшилось на decrease (отписка,
+    исправление счётчика); ленты дозаполняются, если оно пересекло порог.
+    """
+    count = UserStats.objects.filter(
+        user_id=author_id
+    ).values_list('follower_count', flat=True).first()
+    if count is None or not (
+        count + decrease > FANOUT_FOLLOWERS_LIMIT >= count
+    ):
+        return
+    sql = f"""
+        INSERT INTO {TimelineEntry._meta.db_table} (user_id, post_id, pub_date)
+        SELECT follow.user_id, recent.id, recent.pub_date
+        FROM {Follow._meta.db_table} follow
+        JOIN (
+            SELECT id, pub_date FROM {Post._meta.db_table}
+            WHERE author_id = %s
+            ORDER BY pub_date DESC
+            LIMIT %s
+        ) recent
+        WHERE follow.author_id = %s
+        ON CONFLICT DO NOTHING
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [author_id, BACKFILL_POSTS, author_id])
+
+
+def remove(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id
+    ).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Страницы ленты подписок по ключу (pub_date, id поста).
+
+    Ключи страницы берутся из TimelineEntry по индексу
+    (user, pub_date, post) и из постов авторов, читаемых напрямую; оба
+    источника читаются от курсора не дальше одной страницы, затем
+    сливаются. Сами посты загружаются одним запросом по id.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.for_feed(), per_page)
+        self.sources = [CursorPaginator(
+            TimelineEntry.objects.filter(user=user).only('post', 'pub_date'),
+            per_page,
+            key_field='post_id'
+        )]
+        pull = list(pull_authors(user))
+        if pull:
+            self.sources.append(CursorPaginator(
+                Post.objects.filter(author_id__in=pull).only('pub_date'),
+                per_page,
+                key_field='id'
+            ))
+
+    def fetch(self, value=None, pk=None, reverse=False):
+        keys = set()
+        has_more = False
+        for source in self.sources:
+            items, source_has_more = source.fetch(value, pk, reverse)
+            has_more = has_more or source_has_more
+            keys.update(
+                (getattr(item, self.date_field),
+                 getattr(item, source.key_field))
+                for item in items
+            )
+        keys = sorted(keys, reverse=self.descending != reverse)
+        has_more = has_more or len(keys) > self.per_page
+        ids = [post_id for _, post_id in keys[:self.per_page]]
+        posts = self.object_list.in_bulk(ids)
+        items = [posts[post_id] for post_id in ids if post_id in posts]
+        return items, has_more
+
+
+def feed_page(user, per_page, cursor=None):
+    """Страница ленты подписок пользователя."""
+    return TimelinePaginator(user, per_page).get_page(cursor)
@@ -0,0 +1,116 @@
+"""Приём картинок постов.
+
+ImageUploadHandler стоит первым в FILE_UPLOAD_HANDLERS и смотрит на файл,
+пока тот ещё принимается: слишком большой файл или картинка, размеры
+которой по заголовку превышают лимит, дальше не буферизуются, а форма
+получает RejectedUpload с текстом ошибки.
+
+normalize() приводит принятую картинку к виду для хранения: уменьшает
+слишком большие (для JPEG через draft, без декодирования в полном
+размере), убирает EXIF и пересохраняет в progressive JPEG.
+"""
+import os
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import (
+    SimpleUploadedFile, UploadedFile
+)
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Сколько первых байтов файла копить, чтобы прочитать заголовок.
+HEADER_BYTES = 64 * 1024
+JPEG_QUALITY = 85
+
+
+class RejectedUpload(UploadedFile):
+    """Файл, приём которого прерван; вместо содержимого — причина."""
+
+    def __init__(self, name, error):
+        super().__init__(BytesIO(), name=name, size=0)
+        self.error = error
+
+
+class ImageUploadHandler(FileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b''
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error is not None:
+            return None
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            limit = filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)
+            self.error = f'Файл больше {limit}'
+            return None
+        if self.header is not None:
+            self.header += raw_data
+            self.check_header()
+            if self.error is not None:
+                return None
+        return raw_data
+
+    def check_header(self):
+        try:
+            width, height = Image.open(BytesIO(self.header)).size
+        except Image.DecompressionBombError:
+            self.error = 'Слишком большое разрешение картинки'
+            return
+        except Exception:
+            # Заголовок ещё не дочитан или это не картинка: второе
+            # проверит форма.
+            if len(self.header) >= HEADER_BYTES:
+                self.header = None
+            return
+        self.header = None
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.error = 'Слишком большое разрешение картинки'
+
+    def file_complete(self, file_size):
+        if self.error is None:
+            return None
+        return RejectedUpload(self.file_name, self.error)
+
+
+def normalize(upload):
+    """Картинка для хранения: JPEG без EXIF и не больше лимита по сторонам.
+
+    Небольшие картинки в других форматах сохраняются как есть. Если
+    картинку не удаётся декодировать, бросает ValidationError.
+    """
+    limit = settings.IMAGE_MAX_DIMENSION
+    upload.seek(0)
+    image = Image.open(upload)
+    if image.format != 'JPEG' and max(image.size) <= limit:
+        upload.seek(0)
+        return upload
+    try:
+        # Для JPEG декодер сразу уменьшает картинку в 2, 4 или 8 раз.
+        image.draft('RGB', (limit, limit))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((limit, limit), Image.LANCZOS)
+        output = BytesIO()
+        image.save(
+            output,
+            'JPEG',
+            quality=JPEG_QUALITY,
+            optimize=True,
+            progressive=True,
+            icc_profile=image.info.get('icc_profile')
+        )
+    except (OSError, Image.DecompressionBombError):
+        # Заголовок цел, а данные — нет (например, файл обрезан).
+        raise forms.ValidationError('Не удалось прочитать картинку')
+    name = os.path.splitext(os.path.basename(upload.name))[0] + '.jpg'
+    return SimpleUploadedFile(name, output.getvalue(), 'image/jpeg')
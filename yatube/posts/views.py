@@ -1,49 +1,88 @@
+from urllib.parse import urlencode
+
 from django.shortcuts import get_object_or_404, render, redirect
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
+from django.http import Http404
 
+from core.caching import cache_page_versioned
+from core.conditional import conditional, get_validators
+from core.pagination import CursorPaginator, ScoreCursorPaginator
+from core.streaming import render_stream
+from . import conditions, counters, thumbnails, timeline
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Comment, Follow
+from .search import to_match_query
 
 TEXT_PREVIEW_SYMBOLS = 30
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+
+def get_page_obj(request, posts):
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('cursor'))
+
 
+def get_comments_page(request, post_id):
+    """Очередная порция комментариев поста, новые сначала."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).order_by('-created', '-id')
+    paginator = CursorPaginator(comments, COMMENTS_PER_PAGE, 'created')
+    return paginator.get_page(request.GET.get('cursor'))
 
-@cache_page(20, key_prefix='index_page')
+
+@conditional(conditions.index, by_encoding=True)
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'posts', 'groups')
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page_obj = get_page_obj(request, post_list)
+    thumbnails.prefetch(page_obj)
     context = {
         'title': 'Последние обновления на сайте',
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return render_stream(
+        request,
+        'posts/index.html',
+        context,
+        page_obj,
+        'includes/feed_item.html'
+    )
 
 
+@conditional(conditions.group_posts, by_encoding=True)
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'group:{slug}', 'groups')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.for_feed()
+    page_obj = get_page_obj(request, posts)
+    thumbnails.prefetch(page_obj)
     context = {
         'title': f'Последние обновления в группе {group.title}',
         'group': group,
         'page_obj': page_obj
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_stream(
+        request,
+        'posts/group_list.html',
+        context,
+        page_obj,
+        'includes/post_item.html'
+    )
 
 
+@conditional(conditions.profile, by_encoding=True)
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'author:{username}', 'groups')
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    user_posts = user.posts.all()
-    paginator = Paginator(user_posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    post_amount = user_posts.count()
+    user = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    user_posts = user.posts.for_feed()
+    page_obj = get_page_obj(request, user_posts)
+    stats = counters.get_stats(user)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=user
@@ -52,11 +91,43 @@ def profile(request, username):
         'title': f'Профайл пользователя {user.first_name} {user.last_name}',
         'author': user,
         'user_posts': user_posts,
-        'post_amount': post_amount,
+        'post_amount': stats.post_count,
+        'stats': stats,
         'page_obj': page_obj,
         'following': following
     }
-    return render(request, 'posts/profile.html', context)
+    return render_stream(
+        request,
+        'posts/profile.html',
+        context,
+        page_obj,
+        'includes/profile_item.html'
+    )
+
+
+@conditional(conditions.search, by_encoding=True)
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'posts', 'groups')
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if to_match_query(query):
+        posts = Post.objects.search(query).for_feed()
+        paginator = ScoreCursorPaginator(posts, POSTS_PER_PAGE, 'search_rank')
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+        thumbnails.prefetch(page_obj)
+    context = {
+        'title': f'Поиск: {query}' if query else 'Поиск',
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render_stream(
+        request,
+        'posts/search.html',
+        context,
+        page_obj,
+        'includes/post_item.html'
+    )
 
 
 @login_required
@@ -97,10 +168,14 @@ def post_edit(request, post_id):
     )
 
 
+@conditional(conditions.post_detail)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_amount = Post.objects.all().filter(author=post.author).count()
-    comments = Comment.objects.filter(post=post)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id
+    )
+    post_amount = counters.get_stats(post.author).post_count
+    comments = get_comments_page(request, post.id)
     comment_form = CommentForm(
         request.POST or None
     )
@@ -115,6 +190,20 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional(conditions.post_detail)
+def post_comments(request, post_id):
+    # Валидаторы уже посчитаны декоратором; их нет, только если нет поста.
+    if get_validators(
+        request, conditions.post_detail, post_id=post_id
+    ) == (None, None):
+        raise Http404('Пост не найден')
+    context = {
+        'post_id': post_id,
+        'comments': get_comments_page(request, post_id),
+    }
+    return render(request, 'includes/comments.html', context)
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -128,18 +217,23 @@ def add_comment(request, post_id):
 
 
 @login_required
+@conditional(conditions.follow_index, by_encoding=True)
 def follow_index(request):
-    post_list = Post.objects.select_related('author').filter(
-        author__following__user=request.user
+    page_obj = timeline.feed_page(
+        request.user, POSTS_PER_PAGE, request.GET.get('cursor')
     )
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    thumbnails.prefetch(page_obj)
     context = {
         'title': 'Последние обновления от авторов, на которых вы подписаны',
         'page_obj': page_obj,
     }
-    return render(request, 'posts/follow.html', context)
+    return render_stream(
+        request,
+        'posts/follow.html',
+        context,
+        page_obj,
+        'includes/feed_item.html'
+    )
 
 
 @login_required
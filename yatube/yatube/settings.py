@@ -1,7 +1,18 @@
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Тесты (manage.py test и pytest) не трогают файлы разработчика: их
+# служебные базы лежат во временном каталоге, своём для каждого запуска.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+if TESTING:
+    TEST_DATA_DIR = tempfile.mkdtemp(prefix='yatube-test-')
+    atexit.register(shutil.rmtree, TEST_DATA_DIR, True)
+
 SECRET_KEY = 'lrj*$1f^+w(gw9=g-egs61%d4thsl&y&qf%rbuda538ktm1)5v'
 
 DEBUG = True
@@ -13,6 +24,7 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
@@ -26,7 +38,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.replicas.ReplicationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,7 +57,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -60,14 +74,34 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Прогревать шаблоны и URL-резолверы при загрузке WSGI-приложения.
+WARMUP_ON_START = False
+
 
+# SQLite в режиме WAL, см. core.db_backends.sqlite3. Соединения живут
+# CONN_MAX_AGE секунд и переиспользуются запросами одного потока.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db_backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения: копии db.sqlite3, которые обновляет команда
+# sync_replicas. Их число задаёт переменная окружения YATUBE_DB_REPLICAS.
+for number in range(1, int(os.environ.get('YATUBE_DB_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.db_backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.replicas.PrimaryReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_STICKY_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -99,6 +133,7 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -110,10 +145,49 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': os.path.join(
+            TEST_DATA_DIR if TESTING else BASE_DIR, 'cache.sqlite3'
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'LOCAL_MAX_ENTRIES': 500,
+            'LOCAL_TIMEOUT': 5,
+            'SYNC_INTERVAL': 0.5,
+        }
     }
 }
 
+# Процессов для фоновой генерации миниатюр; 0 — генерировать на месте.
+THUMBNAIL_WORKERS = 2
+
+# Общий для всех воркеров файл метрик и как часто процесс дописывает в
+# него накопленное.
+METRICS_PATH = os.path.join(
+    TEST_DATA_DIR if TESTING else BASE_DIR, 'metrics.sqlite3'
+)
+METRICS_FLUSH_INTERVAL = 1.0
+# Адреса, с которых /metrics доступна без входа (сборщик метрик), через
+# запятую в YATUBE_METRICS_ALLOWED_IPS. Сотрудникам страница доступна всегда.
+METRICS_ALLOWED_IPS = os.environ.get(
+    'YATUBE_METRICS_ALLOWED_IPS', '127.0.0.1'
+).split(',')
+
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 50 * 1000 * 1000
+# Более крупные картинки уменьшаются до этой длины большей стороны.
+IMAGE_MAX_DIMENSION = 2560
+
+# Уровень вывода строк с замерами запросов (core.timing). По умолчанию
+# WARNING, то есть строки не выводятся; YATUBE_TIMING_LOG_LEVEL=INFO
+# включает их и при DEBUG=False.
+TIMING_LOG_LEVEL = os.environ.get('YATUBE_TIMING_LOG_LEVEL', 'WARNING')
+
 LOGGING = {
     'version': 1,
     'filters': {
@@ -126,12 +200,22 @@ LOGGING = {
             'level': 'DEBUG',
             'filters': ['require_debug_true'],
             'class': 'logging.StreamHandler',
-        }
+        },
+        # Без фильтра DEBUG: замеры можно включить и в продакшене.
+        'timing': {
+            'level': TIMING_LOG_LEVEL,
+            'class': 'logging.StreamHandler',
+        },
     },
     'loggers': {
         'django.db.backends': {
             'level': 'DEBUG',
             'handlers': ['console'],
-        }
+        },
+        'core.timing': {
+            'level': 'INFO',
+            'handlers': ['timing'],
+            'propagate': False,
+        },
     }
 }
@@ -0,0 +1,46 @@
+"""Настройки для боевого запуска.
+
+Включаются через DJANGO_SETTINGS_MODULE=yatube.settings_production.
+Отличаются от разработческих выключенным DEBUG, кеширующим загрузчиком
+шаблонов (в Django 2.2 он сам не включается), прогревом воркеров и
+статикой с хешами в именах, которую отдаёт само приложение.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import MIDDLEWARE, SECRET_KEY, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', '127.0.0.1,localhost'
+).split(',')
+
+# Шаблоны разбираются один раз на процесс, а не на каждый рендеринг.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]
+        )],
+    },
+}]
+
+WARMUP_ON_START = True
+
+# Статика с хешами в именах и сжатыми копиями: `manage.py collectstatic`.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+MIDDLEWARE = [
+    *MIDDLEWARE[:2],
+    'core.static.StaticFilesMiddleware',
+    *MIDDLEWARE[2:],
+]
@@ -1,7 +1,15 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Без --preload gunicorn импортирует модуль в каждом воркере после fork,
+# так что прогрев шаблонов и резолверов достаётся каждому процессу.
+if settings.WARMUP_ON_START:
+    from core import warmup
+
+    warmup.warm_process()